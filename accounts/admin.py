@@ -3,9 +3,25 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import User, UserProfile, Wishlist
 
 
+class ChangelistOnlyMixin:
+    """Restrict the changelist query to the columns the list actually renders"""
+    changelist_only_fields = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # The change form needs every column, so only narrow the changelist
+        match = getattr(request, 'resolver_match', None)
+        if self.changelist_only_fields and match and (match.url_name or '').endswith('_changelist'):
+            if isinstance(self.list_select_related, (list, tuple)):
+                queryset = queryset.select_related(*self.list_select_related)
+            queryset = queryset.only(*self.changelist_only_fields)
+        return queryset
+
+
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(ChangelistOnlyMixin, BaseUserAdmin):
     list_display = ('username', 'email', 'role', 'status', 'owner_type', 'email_verified', 'created_at')
+    changelist_only_fields = ('id', 'username', 'email', 'role', 'status', 'owner_type', 'email_verified', 'created_at')
     list_filter = ('role', 'status', 'owner_type', 'email_verified', 'created_at')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     ordering = ('-created_at',)
@@ -29,9 +45,11 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ChangelistOnlyMixin, admin.ModelAdmin):
     list_display = ('user', 'city', 'country', 'preferred_language', 'currency_preference')
     list_filter = ('country', 'preferred_language', 'currency_preference')
+    list_select_related = ('user',)
+    changelist_only_fields = ('id', 'user__id', 'user__username', 'city', 'country', 'preferred_language', 'currency_preference')
     search_fields = ('user__username', 'user__email', 'city', 'country')
     raw_id_fields = ('user',)
     
@@ -48,6 +66,7 @@ class UserProfileAdmin(admin.ModelAdmin):
 class WishlistAdmin(admin.ModelAdmin):
     list_display = ('user', 'property_id', 'created_at')
     list_filter = ('created_at',)
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__email')
     raw_id_fields = ('user',)
     readonly_fields = ('created_at',)
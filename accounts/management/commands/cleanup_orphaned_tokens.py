@@ -1,9 +1,29 @@
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 from accounts.models import EmailVerification, PasswordReset, Wishlist
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+DELETE_BATCH_SIZE = 1000
+
+
+def _paged_delete(queryset, batch=DELETE_BATCH_SIZE):
+    """Delete matching rows in primary-key pages, committing each page on its own"""
+    model = queryset.model
+    total = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch])
+        if not pks:
+            return total
+        # One short transaction per page so other writers aren't blocked for the whole run
+        with transaction.atomic():
+            _, deleted = model.objects.filter(pk__in=pks).delete()
+        total += deleted.get(model._meta.label, 0)
+
 
 class Command(BaseCommand):
     help = 'Clean up orphaned verification tokens from deleted users'
@@ -15,6 +35,19 @@ class Command(BaseCommand):
             help='Show what would be deleted without actually deleting',
         )
 
+    def _purge(self, queryset, dry_run):
+        """Count matching rows on a dry run, otherwise delete them page by page"""
+        if dry_run:
+            return queryset.count()
+        return _paged_delete(queryset)
+
+    def _report(self, kind, model_name, count, dry_run):
+        """Write the count on a dry run, otherwise a single line for what was deleted"""
+        if dry_run:
+            self.stdout.write(f'{kind.capitalize()} {model_name} records: {count}')
+        else:
+            self.stdout.write(f'Deleted {count} {kind} {model_name} records')
+
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         
@@ -24,44 +57,32 @@ class Command(BaseCommand):
         
         # Find orphaned EmailVerification records
         orphaned_ev = EmailVerification.objects.filter(user__isnull=True)
-        ev_count = orphaned_ev.count()
+        ev_count = self._purge(orphaned_ev, dry_run)
         
         if ev_count > 0:
-            self.stdout.write(f'Orphaned EmailVerification records: {ev_count}')
-            if not dry_run:
-                deleted_ev, _ = orphaned_ev.delete()
-                self.stdout.write(f'Deleted: {deleted_ev}')
+            self._report('orphaned', 'EmailVerification', ev_count, dry_run)
         else:
             self.stdout.write('No orphaned EmailVerification records found')
         
         # Find orphaned PasswordReset records
         orphaned_pr = PasswordReset.objects.filter(user__isnull=True)
-        pr_count = orphaned_pr.count()
+        pr_count = self._purge(orphaned_pr, dry_run)
         
         if pr_count > 0:
-            self.stdout.write(f'Orphaned PasswordReset records: {pr_count}')
-            if not dry_run:
-                deleted_pr, _ = orphaned_pr.delete()
-                self.stdout.write(f'Deleted: {deleted_pr}')
+            self._report('orphaned', 'PasswordReset', pr_count, dry_run)
         else:
             self.stdout.write('No orphaned PasswordReset records found')
         
         # Find orphaned Wishlist records
         orphaned_wl = Wishlist.objects.filter(user__isnull=True)
-        wl_count = orphaned_wl.count()
+        wl_count = self._purge(orphaned_wl, dry_run)
         
         if wl_count > 0:
-            self.stdout.write(f'Orphaned Wishlist records: {wl_count}')
-            if not dry_run:
-                deleted_wl, _ = orphaned_wl.delete()
-                self.stdout.write(f'Deleted: {deleted_wl}')
+            self._report('orphaned', 'Wishlist', wl_count, dry_run)
         else:
             self.stdout.write('No orphaned Wishlist records found')
         
         # Also clean up expired tokens (older than 7 days)
-        from django.utils import timezone
-        from datetime import timedelta
-        
         expired_threshold = timezone.now() - timedelta(days=7)
         
         # Clean up expired EmailVerification tokens
@@ -69,26 +90,20 @@ class Command(BaseCommand):
             created_at__lt=expired_threshold,
             is_used=False
         )
-        ev_expired_count = expired_ev.count()
+        ev_expired_count = self._purge(expired_ev, dry_run)
         
         if ev_expired_count > 0:
-            self.stdout.write(f'Expired EmailVerification records: {ev_expired_count}')
-            if not dry_run:
-                deleted_expired_ev, _ = expired_ev.delete()
-                self.stdout.write(f'Deleted: {deleted_expired_ev}')
+            self._report('expired', 'EmailVerification', ev_expired_count, dry_run)
         
         # Clean up expired PasswordReset tokens
         expired_pr = PasswordReset.objects.filter(
             created_at__lt=expired_threshold,
             is_used=False
         )
-        pr_expired_count = expired_pr.count()
+        pr_expired_count = self._purge(expired_pr, dry_run)
         
         if pr_expired_count > 0:
-            self.stdout.write(f'Expired PasswordReset records: {pr_expired_count}')
-            if not dry_run:
-                deleted_expired_pr, _ = expired_pr.delete()
-                self.stdout.write(f'Deleted: {deleted_expired_pr}')
+            self._report('expired', 'PasswordReset', pr_expired_count, dry_run)
         
         if dry_run:
             self.stdout.write('')
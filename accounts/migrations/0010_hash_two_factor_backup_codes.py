@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:40
+
+import hashlib
+
+from django.db import migrations
+
+
+def hash_backup_codes(apps, schema_editor):
+    """Replace plaintext backup codes with their SHA-256 hashes"""
+    User = apps.get_model('accounts', 'User')
+    for user in User.objects.only('id', 'two_factor_backup_codes').iterator():
+        codes = user.two_factor_backup_codes or []
+        if not codes:
+            continue
+        user.two_factor_backup_codes = [
+            code if len(code) == 64 else hashlib.sha256(code.encode('utf-8')).hexdigest()
+            for code in codes
+        ]
+        user.save(update_fields=['two_factor_backup_codes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_emailverification_passwordreset_unused_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_backup_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:45
+
+from django.db import migrations
+
+
+def truncate_backup_code_hashes(apps, schema_editor):
+    """Shorten stored SHA-256 hex digests to their first 16 bytes"""
+    User = apps.get_model('accounts', 'User')
+    for user in User.objects.only('id', 'two_factor_backup_codes').iterator():
+        codes = user.two_factor_backup_codes or []
+        if not any(len(code) == 64 for code in codes):
+            continue
+        user.two_factor_backup_codes = [code[:32] for code in codes]
+        user.save(update_fields=['two_factor_backup_codes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_lowercase_user_emails'),
+    ]
+
+    operations = [
+        migrations.RunPython(truncate_backup_code_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:20
+
+from django.db import migrations
+
+
+def reset_backup_codes(apps, schema_editor):
+    """Drop unkeyed backup code hashes; they can't be rehashed without the codes"""
+    User = apps.get_model('accounts', 'User')
+    User.objects.exclude(two_factor_backup_codes=[]).update(two_factor_backup_codes=[])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_truncate_two_factor_backup_code_hashes'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_backup_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:40
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_invitation_emails(apps, schema_editor):
+    """Lowercase existing invitation emails to match what the invitation view now stores"""
+    EmailVerification = apps.get_model('accounts', 'EmailVerification')
+    EmailVerification.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_reset_two_factor_backup_codes'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_invitation_emails, migrations.RunPython.noop),
+    ]
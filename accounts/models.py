@@ -1,11 +1,44 @@
 from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
 import pyotp
 import secrets
 import qrcode
+from qrcode.image.svg import SvgPathImage
 import io
 import base64
+import hashlib
+import hmac
+import time
+
+
+# time step -> {(secret digest, token): result}; repeat submissions skip the HMACs.
+# Only the current step is kept, since results for earlier steps are never looked up again.
+_TOTP_VERIFY_CACHE = {}
+_TOTP_VERIFY_CACHE_MAX_ENTRIES = 1024
+
+
+def _hash_backup_code(code):
+    """Hash a 2FA backup code for storage and lookup"""
+    # Keyed so a leaked table can't be brute-forced over the small code space offline
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), code.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+# Seconds the 2FA status summary is cached; saves touching the 2FA columns clear it
+TWO_FACTOR_STATUS_CACHE_TTL = 300
+
+
+def two_factor_status_cache_key(user_id):
+    return f'2fa:{user_id}'
+
+
+class UserManager(BaseUserManager):
+    """Default user manager that leaves the 2FA columns out of ordinary reads"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('two_factor_secret', 'two_factor_backup_codes')
 
 
 class User(AbstractUser):
@@ -35,56 +68,134 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserManager()
+
     class Meta:
         verbose_name = 'user'
         verbose_name_plural = 'users'
+        indexes = [
+            models.Index(fields=['role', 'status'], name='user_role_status_idx'),
+            models.Index(fields=['email'], name='user_email_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Store emails lowercased so lookups can use exact, indexable matches; partial
+        # saves that don't write the email leave it (and any deferred value) alone
+        if (update_fields is None or 'email' in update_fields) and self.email:
+            self.email = self.email.lower()
+        super().save(*args, **kwargs)
+        if update_fields is None or {'two_factor_enabled', 'two_factor_backup_codes'} & set(update_fields):
+            cache.delete(two_factor_status_cache_key(self.pk))
+
+    def get_2fa_status(self):
+        """2FA enabled flag and backup-code count, cached between changes"""
+        def load():
+            # Read just the two columns; the backup codes are deferred on ordinary loads
+            row = User.objects.filter(pk=self.pk).values('two_factor_enabled', 'two_factor_backup_codes').first()
+            backup_codes_count = len(row['two_factor_backup_codes'] or []) if row else 0
+            return {
+                'two_factor_enabled': bool(row and row['two_factor_enabled']),
+                'has_backup_codes': backup_codes_count > 0,
+                'backup_codes_count': backup_codes_count,
+            }
+        return cache.get_or_set(two_factor_status_cache_key(self.pk), load, TWO_FACTOR_STATUS_CACHE_TTL)
     
     def generate_2fa_secret(self):
         """Generate a new 2FA secret"""
         secret = pyotp.random_base32()
         self.two_factor_secret = secret
-        self.save()
+        self.__dict__.pop('_totp', None)
+        self.save(update_fields=['two_factor_secret'])
         return secret
     
     def get_2fa_qr_code(self, secret):
         """Generate QR code for 2FA setup"""
+        # Setup screens get reloaded; the image only depends on (user, secret)
+        cache_key = self._2fa_qr_cache_key(secret)
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+
         totp_uri = pyotp.totp.TOTP(secret).provisioning_uri(
             name=self.email,
             issuer_name='ReserveWithEase'
         )
-        
-        # Generate QR code
-        qr = qrcode.make(totp_uri)
+        # Single SVG path (no raster drawing or PNG encoding)
+        qr = qrcode.make(totp_uri, image_factory=SvgPathImage)
         buffer = io.BytesIO()
-        qr.save(buffer, format='PNG')
+        qr.save(buffer)
         qr_code_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        return f"data:image/png;base64,{qr_code_base64}"
+        qr_code_data = f"data:image/svg+xml;base64,{qr_code_base64}"
+        cache.set(cache_key, qr_code_data, 300)
+        return qr_code_data
     
+    def _2fa_qr_cache_key(self, secret):
+        return f"2fa:qr:svg:{self.pk}:{hashlib.sha1(secret.encode('utf-8')).hexdigest()}"
+
+    def clear_2fa_qr_code(self):
+        """Drop the cached setup QR code, which embeds the secret, once setup is over"""
+        if self.two_factor_secret:
+            cache.delete(self._2fa_qr_cache_key(self.two_factor_secret))
+
     def generate_backup_codes(self):
-        """Generate backup codes for 2FA"""
-        backup_codes = []
-        for _ in range(10):
-            code = secrets.token_hex(4).upper()
-            backup_codes.append(code)
-        self.two_factor_backup_codes = backup_codes
-        self.save()
+        """Generate backup codes for 2FA (only their hashes are stored)"""
+        if not self.two_factor_enabled:
+            raise ValueError("2FA is not enabled for this user")
+        # One CSPRNG read for all ten codes, 4 bytes (8 hex chars) per code
+        raw = secrets.token_bytes(40)
+        backup_codes = [raw[i:i + 4].hex().upper() for i in range(0, 40, 4)]
+        self.two_factor_backup_codes = [_hash_backup_code(code) for code in backup_codes]
+        self.save(update_fields=['two_factor_backup_codes'])
         return backup_codes
     
+    @cached_property
+    def _totp(self):
+        """TOTP generator for the current secret, built once per instance"""
+        if not self.two_factor_secret:
+            return None
+        return pyotp.TOTP(self.two_factor_secret)
+
     def verify_2fa_token(self, token):
         """Verify a 2FA token"""
-        if not self.two_factor_secret:
+        totp = self._totp
+        if totp is None:
             return False
-        totp = pyotp.TOTP(self.two_factor_secret)
-        return totp.verify(token, valid_window=1)
+
+        now = int(time.time())
+        step = now // totp.interval
+        results = _TOTP_VERIFY_CACHE.get(step)
+        if results is None:
+            # New time step: drop the previous step's results wholesale
+            _TOTP_VERIFY_CACHE.clear()
+            results = _TOTP_VERIFY_CACHE[step] = {}
+
+        key = (hashlib.blake2b(self.two_factor_secret.encode('utf-8'), digest_size=8).digest(), token)
+        cached = results.get(key)
+        if cached is not None:
+            return cached
+
+        result = totp.verify(token, for_time=now, valid_window=1)
+        # Bounded so a flood of distinct tokens can't grow the cache within a step
+        if len(results) < _TOTP_VERIFY_CACHE_MAX_ENTRIES:
+            results[key] = result
+        return result
     
     def verify_backup_code(self, code):
         """Verify a backup code"""
-        if not self.two_factor_backup_codes or code not in self.two_factor_backup_codes:
+        if not self.two_factor_enabled or not self.two_factor_backup_codes:
+            return False
+        code_hash = _hash_backup_code(code.strip().upper())
+        # Compare against every stored code so timing doesn't reveal a partial match
+        matched_index = -1
+        for i, stored in enumerate(self.two_factor_backup_codes):
+            if hmac.compare_digest(stored, code_hash):
+                matched_index = i
+        if matched_index < 0:
             return False
         # Remove used backup code
-        self.two_factor_backup_codes.remove(code)
-        self.save()
+        self.two_factor_backup_codes.pop(matched_index)
+        self.save(update_fields=['two_factor_backup_codes'])
         return True
 
 
@@ -121,6 +232,11 @@ class EmailVerification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_used', 'created_at'], name='ev_unused_created_idx'),
+        ]
+
     def __str__(self):
         return f"Email verification for {self.user.email}"
 
@@ -131,6 +247,11 @@ class PasswordReset(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_used', 'created_at'], name='pr_unused_created_idx'),
+        ]
+
     def __str__(self):
         return f"Password reset for {self.user.email}"
 
@@ -141,36 +262,13 @@ class Wishlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # Batch imports should use bulk_create(..., ignore_conflicts=True) and let
+        # this constraint drop duplicates instead of calling get_or_create per row
         unique_together = ['user', 'property_id']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='wl_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username}'s wishlist - Property #{self.property_id}"
-
-
-# Signals for automatic cleanup
-from django.db.models.signals import post_delete
-from django.dispatch import receiver
-
-
-@receiver(post_delete, sender=User)
-def cleanup_user_related_data(sender, instance, **kwargs):
-    """Clean up orphaned tokens when a user is deleted"""
-    try:
-        # Clean up EmailVerification records
-        deleted_ev = EmailVerification.objects.filter(user=instance).delete()
-        if deleted_ev[0] > 0:
-            print(f"Cleaned up {deleted_ev[0]} orphaned EmailVerification records")
-        
-        # Clean up PasswordReset records
-        deleted_pr = PasswordReset.objects.filter(user=instance).delete()
-        if deleted_pr[0] > 0:
-            print(f"Cleaned up {deleted_pr[0]} orphaned PasswordReset records")
-        
-        # Clean up Wishlist records
-        deleted_wl = Wishlist.objects.filter(user=instance).delete()
-        if deleted_wl[0] > 0:
-            print(f"Cleaned up {deleted_wl[0]} orphaned Wishlist records")
-            
-    except Exception as e:
-        print(f"Error cleaning up user-related data: {e}")
@@ -1,11 +1,77 @@
+import copy
+import logging
+import os
+import re
+import uuid
+from functools import lru_cache
+
 from rest_framework import serializers
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.core.validators import RegexValidator
+from django.db import transaction
+from properties.utils import convert_image_urls_to_public
+from reserve_at_ease.custom_storage import R2Storage
 from .models import User, UserProfile, EmailVerification
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+logger = logging.getLogger(__name__)
+
+USE_R2 = getattr(settings, 'USE_R2', False)
+
+# Share one storage client across uploads; upload names are unique, so skip the exists() probe
+if USE_R2:
+    r2_storage = R2Storage(file_overwrite=True)
+else:
+    r2_storage = None
+
+
+_TOTP_TOKEN_RE = re.compile(r'^[0-9]{6}$')
+_BACKUP_CODE_RE = re.compile(r'^[A-F0-9]{8}$')
+_totp_token_validator = RegexValidator(_TOTP_TOKEN_RE, 'Enter the 6-digit code from your authenticator app.')
+_backup_code_validator = RegexValidator(_BACKUP_CODE_RE, 'Enter an 8-character backup code.')
+
+
+def _property_model():
+    """Look up the Property model through the app registry"""
+    return apps.get_model('properties', 'Property')
+
+
+@lru_cache(maxsize=None)
+def _dummy_password_hash():
+    """Hash checked when no user matches, so failed lookups cost as much as a wrong password"""
+    # Built on first use rather than at import, which would slow every process start
+    return make_password('!')
+
+
+@lru_cache(maxsize=8192)
+def _normalize_phone(phone, country_code):
+    """Merge a phone number and country code into a single +-prefixed number"""
+    if country_code and not country_code.startswith('+'):
+        country_code = f"+{country_code}"
+    if not phone:
+        return country_code
+    if country_code and not phone.startswith('+'):
+        return f"{country_code}{phone}"
+    return phone
+
+
+class CachedFieldsMixin:
+    """Build a ModelSerializer's fields once per class and hand out copies"""
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = type(self)
+        if cls not in CachedFieldsMixin._fields_cache:
+            CachedFieldsMixin._fields_cache[cls] = super().get_fields()
+        return copy.deepcopy(CachedFieldsMixin._fields_cache[cls])
+
+
+class UserRegistrationSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True, required=False, source='confirmPassword')
     firstName = serializers.CharField(write_only=True)
@@ -23,26 +89,15 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         # Handle frontend field names
-        if 'firstName' in attrs:
-            attrs['first_name'] = attrs.pop('firstName')
-        if 'lastName' in attrs:
-            attrs['last_name'] = attrs.pop('lastName')
+        # firstName/lastName are required fields, so they're always present here
+        attrs['first_name'] = attrs.pop('firstName')
+        attrs['last_name'] = attrs.pop('lastName')
 
         # Merge phone number and country code
-        phone = attrs.get('phone', '').strip()
-        country_code = attrs.get('countryCode', '').strip()
-        
-        # Always merge phone and country code if either is provided
-        if phone or country_code:
-            if country_code and not country_code.startswith('+'):
-                country_code = f"+{country_code}"
-            if phone and not phone.startswith('+') and country_code:
-                phone = f"{country_code}{phone}"
-            elif country_code and not phone:
-                phone = country_code
-            attrs['phone'] = phone
-        else:
-            attrs['phone'] = ''
+        attrs['phone'] = _normalize_phone(
+            attrs.get('phone', '').strip(),
+            attrs.get('countryCode', '').strip()
+        )
 
         # Only validate password confirmation if provided
         password_confirm = attrs.get('password_confirm')
@@ -71,44 +126,40 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             validated_data['owner_type'] = ''
             validated_data.setdefault('email_verified', False)
 
-        # Create user with phone field explicitly handled
-        user = User.objects.create_user(
-            username=validated_data['email'],
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=validated_data['first_name'],
-            last_name=validated_data['last_name'],
-            phone=validated_data.get('phone', ''),
-            role=validated_data['role'],
-            owner_type=validated_data['owner_type']
-        )
-
-        # Set email_verified if provided
-        if 'email_verified' in validated_data:
-            user.email_verified = validated_data['email_verified']
-            user.save()
-
-        # Create user profile with additional fields
-        UserProfile.objects.create(
-            user=user,
-            address=address,
-            company=company
-        )
-
-        # Assign property if property_id is provided
-        if property_id:
-            try:
-                from properties.models import Property
-                property_obj = Property.objects.get(id=property_id)
-                property_obj.authorized_users.add(user)
-                property_obj.save()
-                print(f"DEBUG: Successfully assigned property {property_id} to user {user.email}")
-            except Property.DoesNotExist:
-                print(f"ERROR: Property with id {property_id} does not exist")
-                raise serializers.ValidationError(f"Property with id {property_id} does not exist")
-            except Exception as e:
-                print(f"ERROR: Failed to assign property {property_id} to user: {str(e)}")
-                raise serializers.ValidationError(f"Failed to assign property: {str(e)}")
+        with transaction.atomic():
+            # Create user with phone field explicitly handled
+            user = User.objects.create_user(
+                username=validated_data['email'],
+                email=validated_data['email'],
+                password=validated_data['password'],
+                first_name=validated_data['first_name'],
+                last_name=validated_data['last_name'],
+                phone=validated_data.get('phone', ''),
+                role=validated_data['role'],
+                owner_type=validated_data['owner_type'],
+                email_verified=validated_data['email_verified']
+            )
+
+            # Create user profile with additional fields
+            UserProfile.objects.create(
+                user=user,
+                address=address,
+                company=company
+            )
+
+            # Assign property if property_id is provided
+            if property_id:
+                try:
+                    Property = _property_model()
+                    property_obj = Property.objects.only('id').get(id=property_id)
+                    property_obj.authorized_users.add(user)
+                    logger.debug("Assigned property %s to user %s", property_id, user.email)
+                except Property.DoesNotExist:
+                    logger.error("Property with id %s does not exist", property_id)
+                    raise serializers.ValidationError(f"Property with id {property_id} does not exist")
+                except Exception as e:
+                    logger.error("Failed to assign property %s to user: %s", property_id, e)
+                    raise serializers.ValidationError(f"Failed to assign property: {str(e)}")
 
         return user
 
@@ -122,16 +173,13 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if email and password:
-            try:
-                user = User.objects.get(email__iexact=email)
-            except User.DoesNotExist:
-                raise serializers.ValidationError({'detail': 'No account found with this email address'})
-
-            if not user.check_password(password):
-                raise serializers.ValidationError({'detail': 'Incorrect password'})
+            user = User.objects.select_related('profile').filter(email=email.lower()).first()
+            if user is None:
+                check_password(password, _dummy_password_hash())
+                raise serializers.ValidationError({'detail': 'Invalid email or password'})
 
-            if not user.is_active:
-                raise serializers.ValidationError({'detail': 'User account is disabled'})
+            if not user.check_password(password) or not user.is_active:
+                raise serializers.ValidationError({'detail': 'Invalid email or password'})
 
             attrs['user'] = user
             return attrs
@@ -139,15 +187,17 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password')
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = UserProfile
-        fields = '__all__'
+        fields = ('id', 'bio', 'date_of_birth', 'nationality', 'address', 'city',
+                  'country', 'postal_code', 'preferred_language', 'currency_preference',
+                  'notification_preferences', 'company', 'user')
         read_only_fields = ('id', 'user')
 
 
-class UserSerializer(serializers.ModelSerializer):
-    profile = serializers.SerializerMethodField()
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    profile = UserProfileSerializer(read_only=True, allow_null=True)
 
     class Meta:
         model = User
@@ -157,47 +207,35 @@ class UserSerializer(serializers.ModelSerializer):
                   'two_factor_enabled')
         read_only_fields = ('id', 'created_at', 'updated_at', 'email_verified', 'two_factor_enabled')
 
-    def get_profile(self, obj):
-        # For single owners, return the multi-owner's profile from the property
-        if obj.owner_type == 'single':
-            try:
-                from properties.models import Property
-                property_obj = Property.objects.filter(authorized_users=obj).first()
-                if property_obj and property_obj.owner:
-                    multi_owner = property_obj.owner
-                    try:
-                        return UserProfileSerializer(multi_owner.profile).data
-                    except:
-                        return None
-            except Exception:
-                pass
-        
-        try:
-            return UserProfileSerializer(obj.profile).data
-        except:
-            return None
+    def _get_multi_owner(self, obj):
+        """Return the multi-owner behind a single owner's property, resolved once per user"""
+        if '_resolved_owner' not in obj.__dict__:
+            Property = _property_model()
+            property_obj = Property.objects.filter(authorized_users=obj).select_related('owner__profile').first()
+            obj.__dict__['_resolved_owner'] = property_obj.owner if property_obj else None
+        return obj.__dict__['_resolved_owner']
+
+    def _get_profile_picture_url(self, picture):
+        if USE_R2:
+            return convert_image_urls_to_public([picture.name])[0]
+        return picture.url
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         
-        # For single owners, return multi-owner's name, phone, and profile_picture
+        # For single owners, return multi-owner's name, phone, profile and profile_picture
         if instance.owner_type == 'single':
             try:
-                from properties.models import Property
-                property_obj = Property.objects.filter(authorized_users=instance).first()
-                if property_obj and property_obj.owner:
-                    multi_owner = property_obj.owner
+                multi_owner = self._get_multi_owner(instance)
+                if multi_owner:
                     data['first_name'] = multi_owner.first_name
                     data['last_name'] = multi_owner.last_name
                     data['phone'] = multi_owner.phone
+                    profile = getattr(multi_owner, 'profile', None)
+                    data['profile'] = self.fields['profile'].to_representation(profile) if profile is not None else None
                     # Use multi-owner's profile picture
                     if multi_owner.profile_picture:
-                        from django.conf import settings
-                        if settings.USE_R2:
-                            from properties.utils import convert_image_urls_to_public
-                            data['profile_picture'] = convert_image_urls_to_public([multi_owner.profile_picture.name])[0]
-                        else:
-                            data['profile_picture'] = multi_owner.profile_picture.url
+                        data['profile_picture'] = self._get_profile_picture_url(multi_owner.profile_picture)
                     else:
                         data['profile_picture'] = None
             except Exception:
@@ -205,12 +243,7 @@ class UserSerializer(serializers.ModelSerializer):
         else:
             # Convert profile_picture to public R2 URL if R2 is enabled
             if instance.profile_picture:
-                from django.conf import settings
-                if settings.USE_R2:
-                    from properties.utils import convert_image_urls_to_public
-                    data['profile_picture'] = convert_image_urls_to_public([instance.profile_picture.name])[0]
-                else:
-                    data['profile_picture'] = instance.profile_picture.url
+                data['profile_picture'] = self._get_profile_picture_url(instance.profile_picture)
         
         # Only include owner_type for users with 'owner' role
         if instance.role != 'owner':
@@ -219,7 +252,7 @@ class UserSerializer(serializers.ModelSerializer):
         return data
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     profile = UserProfileSerializer(required=False)
     profile_picture = serializers.ImageField(required=False, allow_null=True, allow_empty_file=True)
     
@@ -232,46 +265,39 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         
         # Handle profile_picture upload to R2
         if 'profile_picture' in validated_data:
-            from django.conf import settings
-            if settings.USE_R2:
+            if USE_R2:
                 profile_picture_file = validated_data.pop('profile_picture')
                 if profile_picture_file:
-                    from reserve_at_ease.custom_storage import R2Storage
-                    
-                    r2_storage = R2Storage()
                     try:
-                        profile_picture_path = r2_storage.save(f'profile_pics/{profile_picture_file.name}', profile_picture_file)
+                        extension = os.path.splitext(profile_picture_file.name)[1].lower()
+                        profile_picture_path = r2_storage.save(f'profile_pics/{uuid.uuid4().hex}{extension}', profile_picture_file)
                         validated_data['profile_picture'] = profile_picture_path
                     except Exception as e:
                         # Log the error but don't fail the update
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.error(f"Error uploading profile picture to R2: {e}")
+                        logger.error("Error uploading profile picture to R2: %s", e)
         
         # For single owners, update multi-owner's info instead
         if instance.owner_type == 'single':
-            from properties.models import Property
+            Property = _property_model()
             property_obj = Property.objects.filter(authorized_users=instance).first()
             if property_obj and property_obj.owner:
                 multi_owner = property_obj.owner
-                # Update multi-owner's user fields
-                if 'first_name' in validated_data:
-                    multi_owner.first_name = validated_data.pop('first_name')
-                if 'last_name' in validated_data:
-                    multi_owner.last_name = validated_data.pop('last_name')
-                if 'phone' in validated_data:
-                    multi_owner.phone = validated_data.pop('phone')
-                # Handle profile_picture separately if present
-                if 'profile_picture' in validated_data:
-                    multi_owner.profile_picture = validated_data.pop('profile_picture')
-                multi_owner.save()
+                # Update multi-owner's user fields (profile_picture included if present)
+                owner_fields = [
+                    field for field in ('first_name', 'last_name', 'phone', 'profile_picture')
+                    if field in validated_data
+                ]
+                for field in owner_fields:
+                    setattr(multi_owner, field, validated_data.pop(field))
+                if owner_fields:
+                    multi_owner.save(update_fields=owner_fields + ['updated_at'])
                 
                 # Update multi-owner's profile
                 if profile_data:
                     multi_profile = multi_owner.profile
                     for attr, value in profile_data.items():
                         setattr(multi_profile, attr, value)
-                    multi_profile.save()
+                    multi_profile.save(update_fields=list(profile_data))
                 
                 return instance
         
@@ -279,14 +305,15 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         # Update user fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        if validated_data:
+            instance.save(update_fields=list(validated_data) + ['updated_at'])
         
         # Update profile if provided
         if profile_data:
             profile = instance.profile
             for attr, value in profile_data.items():
                 setattr(profile, attr, value)
-            profile.save()
+            profile.save(update_fields=list(profile_data))
         
         return instance
 
@@ -310,7 +337,7 @@ class PasswordChangeSerializer(serializers.Serializer):
     def save(self):
         user = self.context['request'].user
         user.set_password(self.validated_data['new_password'])
-        user.save()
+        user.save(update_fields=['password'])
         return user
 
 
@@ -318,9 +345,7 @@ class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
 
     def validate_email(self, value):
-        try:
-            user = User.objects.get(email=value)
-        except User.DoesNotExist:
+        if not User.objects.filter(email=value.lower()).exists():
             raise serializers.ValidationError('User with this email does not exist')
         return value
 
@@ -334,7 +359,7 @@ class EmailVerificationSerializer(serializers.ModelSerializer):
 
 class TwoFactorSetupSerializer(serializers.Serializer):
     """Serializer for setting up 2FA"""
-    token = serializers.CharField(max_length=6, min_length=6, required=True)
+    token = serializers.CharField(required=True, validators=[_totp_token_validator])
     
     def validate_token(self, value):
         user = self.context['request'].user
@@ -349,7 +374,8 @@ class TwoFactorSetupSerializer(serializers.Serializer):
     def save(self):
         user = self.context['request'].user
         user.two_factor_enabled = True
-        user.save()
+        user.save(update_fields=['two_factor_enabled'])
+        user.clear_2fa_qr_code()
         
         # Generate backup codes after successful 2FA setup
         backup_codes = user.generate_backup_codes()
@@ -362,8 +388,14 @@ class TwoFactorSetupSerializer(serializers.Serializer):
 
 class TwoFactorVerifySerializer(serializers.Serializer):
     """Serializer for verifying 2FA during login"""
-    token = serializers.CharField(max_length=6, min_length=6, required=False)
-    backup_code = serializers.CharField(max_length=6, min_length=6, required=False)
+    token = serializers.CharField(required=False, validators=[_totp_token_validator])
+    backup_code = serializers.CharField(required=False)
+    
+    def validate_backup_code(self, value):
+        # Accept codes typed in lowercase or with stray spaces before the format check
+        value = value.strip().upper()
+        _backup_code_validator(value)
+        return value
     
     def validate(self, attrs):
         user = self.context['user']
@@ -395,10 +427,12 @@ class TwoFactorDisableSerializer(serializers.Serializer):
     
     def save(self):
         user = self.context['request'].user
+        user.clear_2fa_qr_code()
         user.two_factor_enabled = False
         user.two_factor_secret = None
+        user.__dict__.pop('_totp', None)
         user.two_factor_backup_codes = []
-        user.save()
+        user.save(update_fields=['two_factor_enabled', 'two_factor_secret', 'two_factor_backup_codes'])
         
         return {'message': '2FA disabled successfully'}
 
@@ -413,6 +447,11 @@ class TwoFactorRegenerateBackupCodesSerializer(serializers.Serializer):
             raise serializers.ValidationError("Incorrect password")
         return value
     
+    def validate(self, attrs):
+        if not self.context['request'].user.two_factor_enabled:
+            raise serializers.ValidationError("2FA is not enabled")
+        return attrs
+    
     def save(self):
         user = self.context['request'].user
         backup_codes = user.generate_backup_codes()
@@ -1,15 +1,33 @@
 """
 JWT-based authentication endpoint for frontend access when logged into Django admin.
 """
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
 from django.core.cache import cache
 from rest_framework_simplejwt.tokens import RefreshToken
 import json
 
 User = get_user_model()
 
+# Failed admin logins allowed per client address before it is locked out
+ADMIN_LOGIN_MAX_FAILURES = 5
+ADMIN_LOGIN_LOCKOUT_SECONDS = 300
+
+# Columns needed for the admin user payload and JWT issuing
+ADMIN_USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_superuser', 'is_staff', 'is_active')
+
+
+def _client_address(request):
+    """Address admin login failures are counted against"""
+    if settings.BEHIND_PROXY:
+        # The proxy appends the address it saw last, so that entry can't be forged by the client
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.rsplit(',', 1)[-1].strip()
+    return request.META.get('REMOTE_ADDR')
+
 
 def get_tokens_for_user(user):
     """Generate JWT tokens for a user"""
@@ -30,18 +48,17 @@ def validate_admin_token(request):
     if not token:
         return JsonResponse({'valid': False, 'message': 'No token provided'}, status=400)
     
-    user_id = cache.get(f'admin_session_token_{token}')
-    if not user_id:
+    cache_key = f'admin_session_token_{token}'
+    user_id = cache.get(cache_key)
+    # Claim the token (one-time use); only the request whose delete succeeds may use it
+    if not user_id or not cache.delete(cache_key):
         return JsonResponse({'valid': False, 'message': 'Invalid or expired token'}, status=401)
     
     try:
-        user = User.objects.get(id=user_id)
+        user = User.objects.only(*ADMIN_USER_FIELDS).get(id=user_id)
         if not user.is_superuser:
             return JsonResponse({'valid': False, 'message': 'User is not a superuser'}, status=403)
         
-        # Delete token after use (one-time use)
-        cache.delete(f'admin_session_token_{token}')
-        
         # Generate JWT tokens for the frontend
         tokens = get_tokens_for_user(user)
         
@@ -94,16 +111,24 @@ def admin_session_login(request):
     """
     Login to backend using Django admin credentials and return JWT tokens.
     """
+    # Reject locked-out clients before paying for a password hash
+    # Counted in the shared cache so the limit holds across workers
+    fail_key = f"admin_login_fail_{_client_address(request)}"
+    if cache.get(fail_key, 0) >= ADMIN_LOGIN_MAX_FAILURES:
+        return JsonResponse({
+            'success': False,
+            'message': 'Too many failed login attempts. Please try again later.'
+        }, status=429)
+
     try:
         data = json.loads(request.body)
         username = data.get('username')
         password = data.get('password')
         
-        from django.contrib.auth import authenticate
-        
         user = authenticate(request, username=username, password=password)
         
         if user is not None and user.is_superuser:
+            cache.delete(fail_key)
             # Generate JWT tokens
             tokens = get_tokens_for_user(user)
             return JsonResponse({
@@ -120,6 +145,12 @@ def admin_session_login(request):
                 'tokens': tokens
             })
         else:
+            # add() only succeeds for the first failure, which starts the lockout window
+            if not cache.add(fail_key, 1, ADMIN_LOGIN_LOCKOUT_SECONDS):
+                try:
+                    cache.incr(fail_key)
+                except ValueError:
+                    cache.set(fail_key, 1, ADMIN_LOGIN_LOCKOUT_SECONDS)
             return JsonResponse({
                 'success': False,
                 'message': 'Invalid credentials or not a superuser'
@@ -1,3 +1,750 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import pyotp
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from properties.models import Property
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from .models import _TOTP_VERIFY_CACHE, EmailVerification, PasswordReset, UserProfile, Wishlist
+from .serializers import (
+    TwoFactorDisableSerializer, TwoFactorSetupSerializer, TwoFactorVerifySerializer,
+    UserLoginSerializer, UserProfileSerializer,
+    UserRegistrationSerializer, UserSerializer, UserUpdateSerializer
+)
+from .views import UserProfileView
+
+User = get_user_model()
+
+
+class TwoFactorBackupCodesTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='twofactor',
+            email='twofactor@test.com',
+            password='testpass123'
+        )
+        self.user.two_factor_enabled = True
+        cache.clear()
+
+    def test_backup_codes_are_not_stored_in_plaintext(self):
+        """Test generated backup codes are stored hashed"""
+        codes = self.user.generate_backup_codes()
+
+        self.assertEqual(len(codes), 10)
+        self.user.refresh_from_db()
+        for code in codes:
+            self.assertNotIn(code, self.user.two_factor_backup_codes)
+
+    def test_backup_code_hashes_are_keyed(self):
+        """Test stored backup code hashes depend on SECRET_KEY"""
+        codes = self.user.generate_backup_codes()
+        self.assertTrue(self.user.verify_backup_code(codes[0]))
+
+        with override_settings(SECRET_KEY='another-secret-key'):
+            self.assertFalse(self.user.verify_backup_code(codes[1]))
+
+    def test_backup_codes_require_2fa(self):
+        """Test backup codes are neither issued nor accepted without 2FA"""
+        codes = self.user.generate_backup_codes()
+        self.user.two_factor_enabled = False
+
+        with self.assertRaises(ValueError):
+            self.user.generate_backup_codes()
+        self.assertFalse(self.user.verify_backup_code(codes[0]))
+
+    def test_backup_code_is_single_use(self):
+        """Test a backup code verifies once and is then consumed"""
+        codes = self.user.generate_backup_codes()
+
+        self.assertTrue(self.user.verify_backup_code(codes[0]))
+        self.assertFalse(self.user.verify_backup_code(codes[0]))
+        self.assertFalse(self.user.verify_backup_code('NOTACODE'))
+        self.user.refresh_from_db()
+        self.assertEqual(len(self.user.two_factor_backup_codes), 9)
+
+    def test_2fa_status_follows_backup_code_changes(self):
+        """Test the cached 2FA status is refreshed when backup codes change"""
+        self.user.save(update_fields=['two_factor_enabled'])
+        self.assertEqual(self.user.get_2fa_status()['backup_codes_count'], 0)
+
+        codes = self.user.generate_backup_codes()
+        self.assertEqual(self.user.get_2fa_status()['backup_codes_count'], 10)
+
+        self.user.verify_backup_code(codes[0])
+        status = self.user.get_2fa_status()
+        self.assertTrue(status['two_factor_enabled'])
+        self.assertEqual(status['backup_codes_count'], 9)
+
+
+class TwoFactorTokenTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='totpuser',
+            email='totpuser@test.com',
+            password='testpass123'
+        )
+
+    def test_verify_without_secret(self):
+        """Test tokens are rejected before a secret is generated"""
+        self.assertFalse(self.user.verify_2fa_token('123456'))
+
+    def test_verify_uses_regenerated_secret(self):
+        """Test verification follows the newest secret on the same instance"""
+        old_secret = self.user.generate_2fa_secret()
+        self.assertTrue(self.user.verify_2fa_token(pyotp.TOTP(old_secret).now()))
+
+        new_secret = self.user.generate_2fa_secret()
+        self.assertTrue(self.user.verify_2fa_token(pyotp.TOTP(new_secret).now()))
+
+    def test_verify_cache_keeps_only_current_step(self):
+        """Test cached results are dropped when the time step changes"""
+        self.user.generate_2fa_secret()
+
+        with mock.patch('accounts.models.time.time', return_value=1_000_000.0):
+            self.user.verify_2fa_token('000000')
+            self.user.verify_2fa_token('111111')
+        self.assertEqual(list(_TOTP_VERIFY_CACHE), [1_000_000 // 30])
+        self.assertEqual(len(_TOTP_VERIFY_CACHE[1_000_000 // 30]), 2)
+
+        with mock.patch('accounts.models.time.time', return_value=1_000_060.0):
+            self.user.verify_2fa_token('000000')
+        self.assertEqual(list(_TOTP_VERIFY_CACHE), [1_000_060 // 30])
+
+    def test_setup_qr_code_is_cleared_once_setup_is_over(self):
+        """Test the cached setup QR code is dropped on confirm and disable"""
+        request = RequestFactory().post('/')
+        request.user = self.user
+        secret = self.user.generate_2fa_secret()
+        self.user.save(update_fields=['two_factor_secret'])
+        cache_key = self.user._2fa_qr_cache_key(secret)
+
+        self.user.get_2fa_qr_code(secret)
+        self.assertIsNotNone(cache.get(cache_key))
+        TwoFactorSetupSerializer(context={'request': request}).save()
+        self.assertIsNone(cache.get(cache_key))
+
+        self.user.get_2fa_qr_code(secret)
+        TwoFactorDisableSerializer(context={'request': request}).save()
+        self.assertIsNone(cache.get(cache_key))
+
+
+class CleanupOrphanedTokensCommandTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tokenuser',
+            email='tokenuser@test.com',
+            password='testpass123'
+        )
+        old = timezone.now() - timedelta(days=8)
+
+        EmailVerification.objects.create(user=self.user, token='ev-expired')
+        EmailVerification.objects.create(user=self.user, token='ev-fresh')
+        PasswordReset.objects.create(user=self.user, token='pr-expired')
+        EmailVerification.objects.filter(token='ev-expired').update(created_at=old)
+        PasswordReset.objects.filter(token='pr-expired').update(created_at=old)
+
+    def test_dry_run_keeps_expired_tokens(self):
+        """Test dry run only reports expired tokens"""
+        out = StringIO()
+        call_command('cleanup_orphaned_tokens', '--dry-run', stdout=out)
+
+        self.assertIn('Expired EmailVerification records: 1', out.getvalue())
+        self.assertEqual(EmailVerification.objects.count(), 2)
+        self.assertEqual(PasswordReset.objects.count(), 1)
+
+    def test_deletes_expired_tokens(self):
+        """Test expired unused tokens are deleted and fresh ones kept"""
+        out = StringIO()
+        call_command('cleanup_orphaned_tokens', stdout=out)
+
+        self.assertIn('Deleted 1 expired PasswordReset records', out.getvalue())
+        self.assertNotIn('Expired PasswordReset records', out.getvalue())
+        self.assertEqual(
+            list(EmailVerification.objects.values_list('token', flat=True)),
+            ['ev-fresh']
+        )
+        self.assertFalse(PasswordReset.objects.exists())
+
+
+class UserRegistrationSerializerTestCase(TestCase):
+    def test_owner_registration_is_verified(self):
+        """Test owners are created verified with a profile in one pass"""
+        serializer = UserRegistrationSerializer(data={
+            'email': 'owner@test.com',
+            'firstName': 'Owner',
+            'lastName': 'Test',
+            'password': 'Str0ng-passw0rd!',
+            'role': 'owner',
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        user = serializer.save()
+
+        user.refresh_from_db()
+        self.assertTrue(user.email_verified)
+        self.assertEqual(user.owner_type, 'multi')
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+
+    def test_unknown_property_rolls_back_user(self):
+        """Test a failed property assignment leaves no user behind"""
+        serializer = UserRegistrationSerializer(data={
+            'email': 'single@test.com',
+            'firstName': 'Single',
+            'lastName': 'Owner',
+            'password': 'Str0ng-passw0rd!',
+            'role': 'owner',
+            'owner_type': 'single',
+            'property_id': 999999,
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        self.assertFalse(User.objects.filter(email='single@test.com').exists())
+
+
+class UserLoginSerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='mixedcase@test.com',
+            email='MixedCase@Test.com',
+            password='testpass123'
+        )
+
+    def test_email_is_stored_lowercased(self):
+        """Test emails are normalized to lowercase on save"""
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'mixedcase@test.com')
+
+    def test_partial_save_leaves_deferred_email_unloaded(self):
+        """Test saves that don't write the email don't load or touch it"""
+        user = User.objects.only('id', 'first_name').get(pk=self.user.pk)
+        user.first_name = 'Mixed'
+
+        with self.assertNumQueries(1):
+            user.save(update_fields=['first_name'])
+        self.assertIn('email', user.get_deferred_fields())
+
+    def test_login_ignores_email_case(self):
+        """Test login matches the email regardless of case"""
+        serializer = UserLoginSerializer(data={
+            'email': 'MIXEDCASE@test.com',
+            'password': 'testpass123'
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['user'], self.user)
+
+    def test_unknown_email_and_wrong_password_look_alike(self):
+        """Test login failures don't reveal whether the account exists"""
+        unknown = UserLoginSerializer(data={'email': 'nobody@test.com', 'password': 'testpass123'})
+        wrong = UserLoginSerializer(data={'email': 'mixedcase@test.com', 'password': 'wrongpass'})
+
+        self.assertFalse(unknown.is_valid())
+        self.assertFalse(wrong.is_valid())
+        self.assertEqual(unknown.errors, wrong.errors)
+
+    def test_login_loads_profile_with_user(self):
+        """Test the logged-in user comes back with their profile already joined"""
+        UserProfile.objects.create(user=self.user, city='Lagos')
+        serializer = UserLoginSerializer(data={'email': 'mixedcase@test.com', 'password': 'testpass123'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(serializer.validated_data['user'].profile.city, 'Lagos')
+
+    def test_inactive_user_cannot_log_in(self):
+        """Test inactive accounts get the same error as bad credentials"""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        serializer = UserLoginSerializer(data={'email': 'mixedcase@test.com', 'password': 'testpass123'})
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['detail'], ['Invalid email or password'])
+
+
+class UserSerializerProfileTestCase(TestCase):
+    def test_profile_is_none_without_user_profile(self):
+        """Test users without a UserProfile serialize with a null profile"""
+        user = User.objects.create_user(
+            username='noprofile@test.com',
+            email='noprofile@test.com',
+            password='testpass123'
+        )
+        self.assertIsNone(UserSerializer(user).data['profile'])
+
+    def test_profile_is_serialized(self):
+        """Test the nested profile matches UserProfileSerializer output"""
+        user = User.objects.create_user(
+            username='withprofile@test.com',
+            email='withprofile@test.com',
+            password='testpass123'
+        )
+        profile = UserProfile.objects.create(user=user, city='Lagos', date_of_birth='1990-01-02')
+        profile.refresh_from_db()
+
+        data = UserSerializer(user).data['profile']
+        self.assertEqual(data, UserProfileSerializer(profile).data)
+        self.assertEqual(list(data), list(UserProfileSerializer(profile).data))
+
+    def test_single_owner_shows_multi_owner_details(self):
+        """Test single owners are serialized with their multi-owner's name and profile"""
+        owner = User.objects.create_user(
+            username='multi@test.com',
+            email='multi@test.com',
+            password='testpass123',
+            first_name='Multi',
+            role='owner'
+        )
+        UserProfile.objects.create(user=owner, city='Lagos')
+        single = User.objects.create_user(
+            username='single@test.com',
+            email='single@test.com',
+            password='testpass123',
+            first_name='Single',
+            role='owner',
+            owner_type='single'
+        )
+        UserProfile.objects.create(user=single, city='Kano')
+        property_obj = Property.objects.create(
+            name='Test Property', type='hotel', city='Lagos', country='Nigeria',
+            address='1 Test Street', latitude=0, longitude=0,
+            price_per_night=100, description='Test', owner=owner
+        )
+        property_obj.authorized_users.add(single)
+
+        single = User.objects.get(pk=single.pk)
+        # The user's own profile, then one joined query for the property, owner and owner's profile
+        with self.assertNumQueries(2):
+            data = UserSerializer(single).data
+
+        self.assertEqual(data['first_name'], 'Multi')
+        self.assertEqual(data['profile']['city'], 'Lagos')
+
+
+class TwoFactorVerifySerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='verify2fa@test.com',
+            email='verify2fa@test.com',
+            password='testpass123'
+        )
+        self.user.two_factor_enabled = True
+        self.codes = self.user.generate_backup_codes()
+
+    def test_accepts_backup_code(self):
+        """Test an issued 8-character backup code passes validation"""
+        serializer = TwoFactorVerifySerializer(data={'backup_code': self.codes[0]}, context={'user': self.user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_accepts_lowercase_backup_code(self):
+        """Test a backup code typed in lowercase is normalized before checking"""
+        code = f' {self.codes[0].lower()} '
+        serializer = TwoFactorVerifySerializer(data={'backup_code': code}, context={'user': self.user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['backup_code'], self.codes[0])
+
+    def test_rejects_malformed_backup_code(self):
+        """Test backup codes that aren't 8 hex characters fail before verification"""
+        serializer = TwoFactorVerifySerializer(data={'backup_code': 'NOTACODE'}, context={'user': self.user})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('backup_code', serializer.errors)
+
+    def test_rejects_malformed_token(self):
+        """Test tokens that aren't six digits fail before verification"""
+        serializer = TwoFactorVerifySerializer(data={'token': '12a456'}, context={'user': self.user})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('token', serializer.errors)
+
+
+class UserUpdateSerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='update@test.com',
+            email='update@test.com',
+            password='testpass123',
+            first_name='Old'
+        )
+        UserProfile.objects.create(user=self.user, city='Abuja')
+
+    def test_updates_user_and_profile_fields(self):
+        """Test partial updates persist user and profile changes"""
+        serializer = UserUpdateSerializer(
+            self.user,
+            data={'first_name': 'New', 'profile': {'city': 'Lagos'}},
+            partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'New')
+        self.assertEqual(self.user.profile.city, 'Lagos')
+
+
+class ValidateAdminTokenTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@test.com',
+            password='testpass123'
+        )
+        cache.set('admin_session_token_abc', self.admin.id, 60)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_token_is_single_use(self):
+        """Test an admin session token can only be exchanged once"""
+        first = self.client.get('/api/auth/validate-admin-token/', {'token': 'abc'})
+        second = self.client.get('/api/auth/validate-admin-token/', {'token': 'abc'})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('access', first.json()['tokens'])
+        self.assertEqual(second.status_code, 401)
+
+
+class AdminSessionLoginTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(
+            username='admin',
+            email='admin@test.com',
+            password='testpass123'
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def _login(self, password, **extra):
+        return self.client.post(
+            '/api/auth/admin-login/',
+            data={'username': 'admin', 'password': password},
+            content_type='application/json',
+            **extra
+        )
+
+    def test_repeated_failures_are_locked_out(self):
+        """Test clients are rejected with 429 after too many failed logins"""
+        for _ in range(5):
+            self.assertEqual(self._login('wrongpass').status_code, 401)
+
+        self.assertEqual(self._login('testpass123').status_code, 429)
+
+    def test_successful_login_resets_failures(self):
+        """Test a successful login clears earlier failures"""
+        for _ in range(4):
+            self._login('wrongpass')
+
+        self.assertEqual(self._login('testpass123').status_code, 200)
+        self.assertEqual(self._login('wrongpass').status_code, 401)
+        self.assertEqual(self._login('testpass123').status_code, 200)
+
+    @override_settings(BEHIND_PROXY=True)
+    def test_lockout_is_per_client_behind_proxy(self):
+        """Test clients sharing the proxy address are locked out separately"""
+        for _ in range(5):
+            self._login('wrongpass', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.1')
+
+        self.assertEqual(self._login('testpass123', HTTP_X_FORWARDED_FOR='10.0.0.1').status_code, 429)
+        self.assertEqual(self._login('testpass123', HTTP_X_FORWARDED_FOR='10.0.0.2').status_code, 200)
+
+
+class WishlistViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='wishlist@test.com',
+            email='wishlist@test.com',
+            password='testpass123'
+        )
+        self.owner = User.objects.create_user(
+            username='wlowner@test.com',
+            email='wlowner@test.com',
+            password='testpass123',
+            role='owner'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def _create_property(self, name, price):
+        return Property.objects.create(
+            name=name, type='hotel', city='Lagos', country='Nigeria',
+            address='1 Test Street', latitude=0, longitude=0,
+            price_per_night=price, description='Test', owner=self.owner, status='active'
+        )
+
+    def test_add_to_wishlist_twice(self):
+        """Test adding the same property twice keeps a single row"""
+        first = self.client.post('/api/auth/wishlist/add/', {'property_id': 7}, format='json')
+        second = self.client.post('/api/auth/wishlist/add/', {'property_id': 7}, format='json')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(Wishlist.objects.filter(user=self.user, property_id=7).count(), 1)
+
+    def test_check_wishlist_follows_changes(self):
+        """Test the cached wishlist check sees adds and removals"""
+        self.assertFalse(self.client.get('/api/auth/wishlist/check/7/').data['is_in_wishlist'])
+
+        self.client.post('/api/auth/wishlist/add/', {'property_id': 7}, format='json')
+        self.assertTrue(self.client.get('/api/auth/wishlist/check/7/').data['is_in_wishlist'])
+
+        self.client.delete('/api/auth/wishlist/remove/7/')
+        self.assertFalse(self.client.get('/api/auth/wishlist/check/7/').data['is_in_wishlist'])
+
+    def test_toggle_wishlist(self):
+        """Test toggling adds a property and toggling again removes it"""
+        added = self.client.post('/api/auth/wishlist/toggle/', {'property_id': 7}, format='json')
+        removed = self.client.post('/api/auth/wishlist/toggle/', {'property_id': 7}, format='json')
+
+        self.assertTrue(added.data['is_in_wishlist'])
+        self.assertFalse(removed.data['is_in_wishlist'])
+        self.assertFalse(Wishlist.objects.filter(user=self.user).exists())
+
+    def test_wishlist_keeps_order_and_prices(self):
+        """Test wishlist properties are returned newest first with fallback prices"""
+        first = self._create_property('First', 100)
+        second = self._create_property('Second', 250)
+        Wishlist.objects.create(user=self.user, property_id=first.id)
+        Wishlist.objects.create(user=self.user, property_id=second.id)
+        Wishlist.objects.create(user=self.user, property_id=999999)
+        Wishlist.objects.filter(property_id=first.id).update(created_at=timezone.now() - timedelta(days=1))
+
+        response = self.client.get('/api/auth/wishlist/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([item['id'] for item in data['wishlist']], [second.id, first.id])
+        self.assertEqual(data['wishlist'][0]['price_per_night'], 250.0)
+        self.assertEqual(data['wishlist'][0]['owner'], self.owner.id)
+        self.assertFalse(data['wishlist'][0]['has_discount'])
+
+
+class UserRegistrationViewTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username='taken',
+            email='taken@test.com',
+            password='testpass123'
+        )
+
+    def _register(self, **extra):
+        data = {
+            'email': 'new@test.com',
+            'firstName': 'New',
+            'lastName': 'User',
+            'password': 'Str0ng-passw0rd!',
+        }
+        data.update(extra)
+        return self.client.post('/api/auth/register/', data=data, content_type='application/json')
+
+    def test_duplicate_email_is_rejected(self):
+        """Test registering an existing email in any case is rejected"""
+        response = self._register(email='Taken@Test.com')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'A user with this email already exists')
+
+    def test_duplicate_username_is_rejected(self):
+        """Test registering an existing username is rejected"""
+        response = self._register(username='TAKEN')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'A user with this username already exists')
+
+    def test_profile_fields_are_saved(self):
+        """Test optional profile fields sent at registration are stored"""
+        response = self._register(city='Lagos', country='Nigeria', state='Lagos State')
+
+        self.assertEqual(response.status_code, 201)
+        profile = UserProfile.objects.get(user__email='new@test.com')
+        self.assertEqual(profile.city, 'Lagos')
+        self.assertEqual(profile.country, 'Nigeria')
+
+    def test_profile_picture_string_is_ignored(self):
+        """Test a plain string sent as profile_picture is not stored as the image name"""
+        response = self._register(profile_picture='../../etc/passwd')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(User.objects.get(email='new@test.com').profile_picture)
+
+
+class TokenViewsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tokens@test.com',
+            email='tokens@test.com',
+            password='testpass123'
+        )
+
+    def test_reset_password(self):
+        """Test a reset token sets the new password and is then used up"""
+        PasswordReset.objects.create(user=self.user, token='reset-token')
+
+        response = self.client.post(
+            '/api/auth/reset-password/reset-token/',
+            data={'new_password': 'N3w-passw0rd!'},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('N3w-passw0rd!'))
+        self.assertTrue(PasswordReset.objects.get(token='reset-token').is_used)
+
+    def test_owner_invitation_matches_email_case_insensitively(self):
+        """Test a mixed-case invitation request reuses the pending lowercase invitation"""
+        data = {'email': 'Tokens@Test.com'}
+        with mock.patch('accounts.views._send_email_in_background'):
+            self.client.post('/api/auth/request-owner-invitation/', data=data, content_type='application/json')
+            self.client.post('/api/auth/request-owner-invitation/', data=data, content_type='application/json')
+
+        invitations = EmailVerification.objects.filter(invitation_type='owner_invitation')
+        self.assertEqual(list(invitations.values_list('email', flat=True)), ['tokens@test.com'])
+
+    def test_reset_password_reads_only_needed_user_columns(self):
+        """Test the reset lookup leaves the 2FA columns out of the joined user"""
+        PasswordReset.objects.create(user=self.user, token='narrow-token')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                '/api/auth/reset-password/narrow-token/',
+                data={'new_password': 'N3w-passw0rd!'},
+                content_type='application/json'
+            )
+
+        lookup = next(q['sql'] for q in queries.captured_queries if 'narrow-token' in q['sql'])
+        self.assertNotIn('two_factor_secret', lookup)
+        self.assertNotIn('two_factor_backup_codes', lookup)
+
+    def test_expired_reset_token_is_rejected(self):
+        """Test reset tokens older than a day are rejected"""
+        PasswordReset.objects.create(user=self.user, token='old-token')
+        PasswordReset.objects.filter(token='old-token').update(created_at=timezone.now() - timedelta(days=2))
+
+        response = self.client.post(
+            '/api/auth/reset-password/old-token/',
+            data={'new_password': 'N3w-passw0rd!'},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_reset_email_is_sent_after_commit(self):
+        """Test the reset email is queued on the email pool only once the request commits"""
+        with mock.patch('accounts.views._email_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = self.client.post(
+                    '/api/auth/request-password-reset/',
+                    data={'email': 'Tokens@Test.com'},
+                    content_type='application/json'
+                )
+                executor.submit.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)
+        executor.submit.assert_called_once()
+
+    def test_verify_email(self):
+        """Test a verification token marks the user verified exactly once"""
+        EmailVerification.objects.create(user=self.user, token='verify-token')
+
+        first = self.client.get('/api/auth/verify-email/verify-token/')
+        second = self.client.get('/api/auth/verify-email/verify-token/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.email_verified)
+
+    def test_expired_invitation_is_rejected(self):
+        """Test owner invitations older than a week are rejected"""
+        EmailVerification.objects.create(
+            user=self.user, token='invite-token', email='owner@test.com',
+            invitation_type='owner_invitation', owner_type='single'
+        )
+        EmailVerification.objects.filter(token='invite-token').update(created_at=timezone.now() - timedelta(days=8))
+
+        response = self.client.get('/api/auth/invitation/invite-token/')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class AccountsAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='siteadmin',
+            email='siteadmin@test.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.admin)
+
+    def test_wishlist_changelist_joins_users(self):
+        """Test the served wishlist changelist loads its users in the same query"""
+        for i in range(3):
+            user = User.objects.create_user(username=f'wl{i}', email=f'wl{i}@test.com', password='testpass123')
+            Wishlist.objects.create(user=user, property_id=i)
+
+        response = self.client.get('/admin/accounts/wishlist/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].queryset.query.select_related, {'user': {}})
+
+    def test_profile_changelist_joins_users(self):
+        """Test the served profile changelist loads its users in the same query"""
+        UserProfile.objects.create(user=self.admin, city='Lagos')
+
+        response = self.client.get('/admin/accounts/userprofile/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].queryset.query.select_related, {'user': {}})
+
+    def test_user_changelist_loads_listed_columns_only(self):
+        """Test the served user changelist skips unlisted columns but the change form loads them"""
+        changelist = self.client.get('/admin/accounts/user/')
+        change_form = self.client.get(f'/admin/accounts/user/{self.admin.pk}/change/')
+
+        self.assertEqual(changelist.status_code, 200)
+        fields, defer = changelist.context['cl'].queryset.query.deferred_loading
+        self.assertFalse(defer)
+        self.assertNotIn('password', fields)
+        self.assertEqual(change_form.status_code, 200)
+
+
+class UserProfileViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='profileview@test.com',
+            email='profileview@test.com',
+            password='testpass123'
+        )
+        UserProfile.objects.create(user=self.user, city='Lagos')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_profile_is_joined_with_user(self):
+        """Test the profile view loads the profile with the user, not while serializing"""
+        request = RequestFactory().get('/api/auth/profile/')
+        request.user = self.user
+        view = UserProfileView()
+        view.setup(request)
+
+        with self.assertNumQueries(1):
+            user = view.get_object()
+            self.assertEqual(user.profile.city, 'Lagos')
+
+    def test_get_profile(self):
+        """Test the profile view returns the nested profile"""
+        response = self.client.get('/api/auth/profile/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['profile']['city'], 'Lagos')
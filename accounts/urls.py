@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import include, path
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -35,21 +35,25 @@ urlpatterns = [
     path('complete-invitation/<str:token>/', views.complete_owner_invitation_view, name='complete_invitation'),
     
     # Two-Factor Authentication URLs
-    path('2fa/generate-secret/', views.generate_2fa_secret_view, name='generate_2fa_secret'),
-    path('2fa/setup/', views.setup_2fa_view, name='setup_2fa'),
-    path('2fa/verify/', views.verify_2fa_view, name='verify_2fa'),
-    path('2fa/status/', views.get_2fa_status_view, name='get_2fa_status'),
-    path('2fa/disable/', views.disable_2fa_view, name='disable_2fa'),
-    path('2fa/regenerate-backup-codes/', views.regenerate_backup_codes_view, name='regenerate_backup_codes'),
+    path('2fa/', include([
+        path('generate-secret/', views.generate_2fa_secret_view, name='generate_2fa_secret'),
+        path('setup/', views.setup_2fa_view, name='setup_2fa'),
+        path('verify/', views.verify_2fa_view, name='verify_2fa'),
+        path('status/', views.get_2fa_status_view, name='get_2fa_status'),
+        path('disable/', views.disable_2fa_view, name='disable_2fa'),
+        path('regenerate-backup-codes/', views.regenerate_backup_codes_view, name='regenerate_backup_codes'),
+    ])),
     
     # Additional endpoints
     path('change-password/', views.change_password_view, name='change_password'),
     path('request-owner-invitation/', views.request_owner_invitation_view, name='request_owner_invitation'),
     
     # Wishlist URLs
-    path('wishlist/', views.get_wishlist_view, name='wishlist'),
-    path('wishlist/add/', views.add_to_wishlist_view, name='add_to_wishlist'),
-    path('wishlist/remove/<int:property_id>/', views.remove_from_wishlist_view, name='remove_from_wishlist'),
-    path('wishlist/check/<int:property_id>/', views.check_wishlist_view, name='check_wishlist'),
-    path('wishlist/toggle/', views.toggle_wishlist_view, name='toggle_wishlist'),
+    path('wishlist/', include([
+        path('', views.get_wishlist_view, name='wishlist'),
+        path('add/', views.add_to_wishlist_view, name='add_to_wishlist'),
+        path('remove/<int:property_id>/', views.remove_from_wishlist_view, name='remove_from_wishlist'),
+        path('check/<int:property_id>/', views.check_wishlist_view, name='check_wishlist'),
+        path('toggle/', views.toggle_wishlist_view, name='toggle_wishlist'),
+    ])),
 ]
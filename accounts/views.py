@@ -4,10 +4,15 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.contrib.auth import update_session_auth_hash
-from django.db import IntegrityError
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.conf import settings
-from django.utils.crypto import get_random_string
+from django.core.cache import cache
+from datetime import timedelta
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from secrets import token_urlsafe
 from .models import EmailVerification, PasswordReset, Wishlist
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer,
@@ -16,6 +21,8 @@ from .serializers import (
     TwoFactorDisableSerializer, TwoFactorRegenerateBackupCodesSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 # Get User model
 User = get_user_model()
 
@@ -28,10 +35,46 @@ if settings.USE_R2:
 else:
     r2_storage = None
 
+# How long emailed tokens stay valid; expired rows are filtered out in the query
+VERIFICATION_TTL = timedelta(hours=24)
+INVITATION_TTL = timedelta(days=7)
+
+# Frontend links emailed to users; the token is appended per request
+FRONTEND_URL = settings.FRONTEND_URL.rstrip('/')
+VERIFY_EMAIL_URL_PREFIX = f"{FRONTEND_URL}/verify-email/"
+RESET_PASSWORD_URL_PREFIX = f"{FRONTEND_URL}/reset-password/"
+OWNER_INVITATION_URL_PREFIX = f"{FRONTEND_URL}/owner/verify-email?token="
+SINGLE_OWNER_INVITATION_URL_PREFIX = f"{FRONTEND_URL}/owner/single-verify-email?token="
+
+# Account emails are sent by a small shared pool so SMTP waits stay off the request.
+# Delivery is at most once: a send that fails, or is still queued when the process
+# is killed or recycled, is logged (or lost) rather than retried.
+EMAIL_SEND_WORKERS = 4
+_email_executor = ThreadPoolExecutor(max_workers=EMAIL_SEND_WORKERS, thread_name_prefix='account-email')
+
+# Seconds a user's cached set of wishlisted property ids lives; mutations clear it
+WISHLIST_CACHE_TTL = 300
+
+# Registration fields copied onto the new user's profile when provided
+PROFILE_FIELDS = ('address', 'city', 'country', 'date_of_birth')
+
 # Import DEBUG from settings for error handling
 DEBUG = settings.DEBUG
 
 
+def _wishlist_cache_key(user):
+    return f'wl:{user.id}'
+
+
+def _wishlist_property_ids(user):
+    """Property ids on the user's wishlist, cached between wishlist changes"""
+    return cache.get_or_set(
+        _wishlist_cache_key(user),
+        lambda: set(Wishlist.objects.filter(user=user).values_list('property_id', flat=True)),
+        WISHLIST_CACHE_TTL
+    )
+
+
 class UserRegistrationView(generics.CreateAPIView):
     """Handle user registration"""
     serializer_class = UserRegistrationSerializer
@@ -43,16 +86,20 @@ class UserRegistrationView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Check if email already exists
+        # Check if email or username already exists (one query for both)
         email = request.data.get('email')
-        if email and User.objects.filter(email__iexact=email).exists():
-            return Response({
-                'error': 'A user with this email already exists'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if username already exists
         username = request.data.get('username')
-        if username and User.objects.filter(username__iexact=username).exists():
+        conflicts = Q()
+        if email:
+            conflicts |= Q(email=email.lower())
+        if username:
+            conflicts |= Q(username__iexact=username)
+        existing = User.objects.filter(conflicts).values('email', 'username').first() if conflicts else None
+        if existing:
+            if email and existing['email'] == email.lower():
+                return Response({
+                    'error': 'A user with this email already exists'
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 'error': 'A user with this username already exists'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -75,27 +122,19 @@ class UserRegistrationView(generics.CreateAPIView):
         try:
             if user.role == 'owner' and not user.email_verified:
                 # Owners who haven't verified email need verification
-                print(f"DEBUG: Sending verification email to {user.email} (owner)")
-                token = get_random_string(32)
+                logger.debug("Sending verification email to %s (owner)", user.email)
+                token = token_urlsafe(24)
                 EmailVerification.objects.create(user=user, token=token)
-                verification_url = f"{settings.FRONTEND_URL}/verify-email/{token}/"
+                verification_url = f"{VERIFY_EMAIL_URL_PREFIX}{token}/"
                 
                 # Send HTML email with verification link
-                try:
-                    _send_verification_email(user, verification_url)
-                    print(f"DEBUG: Verification email sent to {user.email}")
-                except Exception as e:
-                    print(f"Error sending verification email: {e}")
+                _send_email_in_background(_send_verification_email, user, verification_url)
             else:
                 # Regular users or verified owners get welcome email
-                print(f"DEBUG: Sending welcome email to {user.email}")
-                try:
-                    _send_welcome_email(user)
-                    print(f"DEBUG: Welcome email sent to {user.email}")
-                except Exception as e:
-                    print(f"Error sending welcome email: {e}")
-        except Exception as e:
-            print(f"Error in email handling: {e}")
+                logger.debug("Sending welcome email to %s", user.email)
+                _send_email_in_background(_send_welcome_email, user)
+        except Exception:
+            logger.exception("Error in email handling")
 
         # Generate JWT tokens
         try:
@@ -109,42 +148,34 @@ class UserRegistrationView(generics.CreateAPIView):
         # Update user profile if provided
         try:
             if hasattr(user, 'profile'):
-                if request.data.get('phone'):
-                    user.profile.phone = request.data.get('phone')
-                if request.data.get('address'):
-                    user.profile.address = request.data.get('address')
-                if request.data.get('city'):
-                    user.profile.city = request.data.get('city')
-                if request.data.get('state'):
-                    user.profile.state = request.data.get('state')
-                if request.data.get('country'):
-                    user.profile.country = request.data.get('country')
-                if request.data.get('date_of_birth'):
-                    user.profile.date_of_birth = request.data.get('date_of_birth')
-                if request.data.get('profile_picture'):
-                    if r2_storage:
-                        # Upload to R2 using the save method
-                        try:
-                            from django.core.files.uploadedfile import UploadedFile
-                            file_obj = request.data.get('profile_picture')
-                            if isinstance(file_obj, UploadedFile):
-                                file_name = file_obj.name
-                            else:
-                                file_name = 'profile_picture'
-                            saved_path = r2_storage.save(f'profiles/{user.id}/{file_name}', file_obj)
-                            user.profile.profile_picture = saved_path
-                        except Exception as e:
-                            print(f"Error uploading profile picture to R2: {e}")
-                    else:
-                        user.profile.profile_picture = request.data.get('profile_picture')
-                user.profile.save()
-        except Exception as e:
+                changed_fields = []
+                for field in PROFILE_FIELDS:
+                    value = request.data.get(field)
+                    if value:
+                        setattr(user.profile, field, value)
+                        changed_fields.append(field)
+                if changed_fields:
+                    user.profile.save(update_fields=changed_fields)
+            # The profile picture lives on the user, not the profile; only accept an uploaded file
+            file_obj = request.FILES.get('profile_picture')
+            if file_obj:
+                if r2_storage:
+                    # Upload to R2 using the save method
+                    try:
+                        saved_path = r2_storage.save(f'profiles/{user.id}/{file_obj.name}', file_obj)
+                        user.profile_picture = saved_path
+                        user.save(update_fields=['profile_picture'])
+                    except Exception:
+                        logger.exception("Error uploading profile picture to R2")
+                else:
+                    user.profile_picture = file_obj
+                    user.save(update_fields=['profile_picture'])
+        except Exception:
             # Log the error but don't fail registration
-            print(f"Error updating user profile: {e}")
+            logger.exception("Error updating user profile")
         
         # Prepare response
         user_data = UserSerializer(user).data
-        user_data.pop('password', None)  # Remove password from response
         
         return Response({
             'message': 'User registered successfully',
@@ -165,24 +196,18 @@ class UserLoginView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        # Inactive accounts are rejected by the serializer along with bad credentials
         user = serializer.validated_data['user']
         
-        # Check if user is active
-        if not user.is_active:
-            return Response({
-                'error': 'Your account has been deactivated. Please contact support.'
-            }, status=status.HTTP_401_UNAUTHORIZED)
-        
-        # Update last login
+        # Update last login (a single UPDATE, no save signals)
         user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
+        User.objects.filter(pk=user.pk).update(last_login=user.last_login)
         
         # Generate JWT tokens
         refresh = RefreshToken.for_user(user)
         
         # Prepare user data
         user_data = UserSerializer(user).data
-        user_data.pop('password', None)  # Remove password from response
         
         return Response({
             'message': 'Login successful',
@@ -201,7 +226,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     parser_classes = [parsers.JSONParser, parsers.MultiPartParser, parsers.FormParser]
 
     def get_object(self):
-        return self.request.user
+        # Load the nested profile with the user instead of lazily while serializing
+        return User.objects.select_related('profile').get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
@@ -223,7 +249,6 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
             serializer.save()
             # Refresh user data with updated profile
             user_data = UserSerializer(instance).data
-            user_data.pop('password', None)
             return Response({
                 'message': 'Profile updated successfully',
                 'user': user_data
@@ -243,24 +268,20 @@ def password_reset_request_view(request):
             'error': 'Email is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        user = User.objects.get(email__iexact=email)
-    except User.DoesNotExist:
+    user = User.objects.filter(email=email.lower()).first()
+    if user is None:
         # Return success even if user doesn't exist (security)
         return Response({
             'message': 'Password reset email sent'
         }, status=status.HTTP_200_OK)
     
     # Create password reset token
-    token = get_random_string(32)
+    token = token_urlsafe(24)
     PasswordReset.objects.create(user=user, token=token)
     
     # Send reset email
-    reset_url = f"{settings.FRONTEND_URL}/reset-password/{token}/"
-    try:
-        _send_password_reset_email(user, reset_url)
-    except Exception as e:
-        print(f"Error sending password reset email: {e}")
+    reset_url = f"{RESET_PASSWORD_URL_PREFIX}{token}/"
+    _send_email_in_background(_send_password_reset_email, user, reset_url)
     
     return Response({'message': 'Password reset email sent'}, status=status.HTTP_200_OK)
 
@@ -269,106 +290,92 @@ def password_reset_request_view(request):
 @permission_classes([permissions.AllowAny])
 def reset_password_view(request, token):
     """Handle password reset confirmation"""
-    try:
-        password_reset = PasswordReset.objects.get(token=token, is_used=False)
-        from django.utils import timezone
-        time_diff = timezone.now() - password_reset.created_at
-        if time_diff.total_seconds() > 24 * 60 * 60:  # 24 hours in seconds
-            return Response({'error': 'Token has expired'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        new_password = request.data.get('new_password')
-        if not new_password:
-            return Response({'error': 'New password is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
+    new_password = request.data.get('new_password')
+    if not new_password:
+        return Response({'error': 'New password is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        # Lock the token row so concurrent submissions can't both use it
+        # Only the columns written here and read by the confirmation email
+        password_reset = PasswordReset.objects.select_for_update(skip_locked=True).select_related('user').only(
+            'id', 'user__id', 'user__password', 'user__email', 'user__first_name', 'user__last_name'
+        ).filter(token=token, is_used=False, created_at__gte=timezone.now() - VERIFICATION_TTL).first()
+        if not password_reset:
+            return Response({'error': 'Invalid or expired token'}, status=status.HTTP_400_BAD_REQUEST)
+
         user = password_reset.user
         user.set_password(new_password)
-        user.save()
-        
-        password_reset.is_used = True
-        password_reset.save()
-        
-        # Send confirmation email
-        try:
-            _send_password_reset_confirmation_email(user)
-        except Exception as e:
-            print(f"Error sending password reset confirmation email: {e}")
-        
-        return Response({'message': 'Password reset successfully'}, status=status.HTTP_200_OK)
-        
-    except PasswordReset.DoesNotExist:
-        return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
+        user.save(update_fields=['password'])
+        PasswordReset.objects.filter(pk=password_reset.pk).update(is_used=True)
+    
+    # Send confirmation email
+    _send_email_in_background(_send_password_reset_confirmation_email, user)
+    
+    return Response({'message': 'Password reset successfully'}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def verify_email_view(request, token):
     """Verify user email"""
-    try:
-        email_verification = EmailVerification.objects.get(token=token, is_used=False)
-        from django.utils import timezone
-        time_diff = timezone.now() - email_verification.created_at
-        if time_diff.total_seconds() > 24 * 60 * 60:  # 24 hours in seconds
-            return Response({'error': 'Token has expired'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if email_verification.invitation_type == 'owner_invitation':
-            # For owner invitations, return invitation details without marking as used yet
-            # The user needs to complete registration first
-            email_verification.is_used = True
-            email_verification.save()
-            
-            return Response({
-                'message': 'Email verified successfully',
-                'invitation_type': 'owner_invitation',
-                'email': email_verification.email,
-                'owner_type': email_verification.owner_type if hasattr(email_verification, 'owner_type') else 'single',
-                'property_id': email_verification.property_id
-            }, status=status.HTTP_200_OK)
-        
-        # Mark email as verified for regular users
-        user = email_verification.user
-        user.email_verified = True
-        user.is_active = True  # Activate the user
-        user.save()
-        
+    with transaction.atomic():
+        # Lock the token row so concurrent requests can't both use it
+        email_verification = EmailVerification.objects.select_for_update(skip_locked=True).only(
+            'id', 'invitation_type', 'email', 'owner_type', 'property_id', 'user_id'
+        ).filter(token=token, is_used=False, created_at__gte=timezone.now() - VERIFICATION_TTL).first()
+        if not email_verification:
+            return Response({'error': 'Invalid or expired token'}, status=status.HTTP_400_BAD_REQUEST)
+
         # Mark verification token as used
-        email_verification.is_used = True
-        email_verification.save()
-        
+        EmailVerification.objects.filter(pk=email_verification.pk).update(is_used=True)
+
+        if email_verification.invitation_type != 'owner_invitation':
+            # Mark email as verified and activate regular users
+            User.objects.filter(pk=email_verification.user_id).update(
+                email_verified=True, is_active=True, updated_at=timezone.now()
+            )
+
+    if email_verification.invitation_type == 'owner_invitation':
+        # For owner invitations, return invitation details; the user completes registration next
         return Response({
-            'message': 'Email verified successfully. You can now login.'
+            'message': 'Email verified successfully',
+            'invitation_type': 'owner_invitation',
+            'email': email_verification.email,
+            'owner_type': email_verification.owner_type if hasattr(email_verification, 'owner_type') else 'single',
+            'property_id': email_verification.property_id
         }, status=status.HTTP_200_OK)
-        
-    except EmailVerification.DoesNotExist:
-        return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': 'Email verified successfully. You can now login.'
+    }, status=status.HTTP_200_OK)
+
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def invitation_verification_view(request, token):
     """Verify invitation token for invited owners"""
-    try:
-        invitation = EmailVerification.objects.get(token=token, invitation_type='owner_invitation', is_used=False)
-        
-        # Check if token is expired (7 days for invitations)
-        from django.utils import timezone
-        time_diff = timezone.now() - invitation.created_at
-        if time_diff.total_seconds() > 7 * 24 * 60 * 60:  # 7 days in seconds
-            return Response({'error': 'Invitation has expired'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Get the invited email and owner type
-        invited_email = invitation.email
-        invitation_type = invitation.invitation_type
-        owner_type = invitation.owner_type if hasattr(invitation, 'owner_type') else 'single'
-        
-        return Response({
-            'message': 'Invitation verified successfully',
-            'email': invited_email,
-            'invitation_type': invitation_type,
-            'owner_type': owner_type
-        }, status=status.HTTP_200_OK)
-        
-    except EmailVerification.DoesNotExist:
+    invitation = EmailVerification.objects.only(
+        'id', 'created_at', 'email', 'invitation_type', 'owner_type'
+    ).filter(
+        token=token, invitation_type='owner_invitation', is_used=False,
+        created_at__gte=timezone.now() - INVITATION_TTL
+    ).first()
+    if not invitation:
         return Response({'error': 'Invalid or expired invitation'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Get the invited email and owner type
+    invited_email = invitation.email
+    invitation_type = invitation.invitation_type
+    owner_type = invitation.owner_type if hasattr(invitation, 'owner_type') else 'single'
+    
+    return Response({
+        'message': 'Invitation verified successfully',
+        'email': invited_email,
+        'invitation_type': invitation_type,
+        'owner_type': owner_type
+    }, status=status.HTTP_200_OK)
+
 
 
 @api_view(['POST'])
@@ -376,13 +383,14 @@ def invitation_verification_view(request, token):
 def complete_owner_invitation_view(request, token):
     """Complete owner invitation registration"""
     try:
-        invitation = EmailVerification.objects.get(token=token, invitation_type='owner_invitation', is_used=False)
-        
-        # Check if token is expired
-        from django.utils import timezone
-        time_diff = timezone.now() - invitation.created_at
-        if time_diff.total_seconds() > 7 * 24 * 60 * 60:
-            return Response({'error': 'Invitation has expired'}, status=status.HTTP_400_BAD_REQUEST)
+        invitation = EmailVerification.objects.only(
+            'id', 'created_at', 'is_used', 'email', 'owner_type'
+        ).filter(
+            token=token, invitation_type='owner_invitation', is_used=False,
+            created_at__gte=timezone.now() - INVITATION_TTL
+        ).first()
+        if not invitation:
+            return Response({'error': 'Invalid or expired invitation'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Validate required fields
         required_fields = ['email', 'first_name', 'last_name', 'username', 'password']
@@ -399,7 +407,7 @@ def complete_owner_invitation_view(request, token):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if email already exists
-        if User.objects.filter(email__iexact=request.data.get('email')).exists():
+        if User.objects.filter(email=request.data.get('email').lower()).exists():
             return Response({
                 'error': 'A user with this email already exists'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -447,8 +455,6 @@ def complete_owner_invitation_view(request, token):
             }
         }, status=status.HTTP_201_CREATED)
         
-    except EmailVerification.DoesNotExist:
-        return Response({'error': 'Invalid or expired invitation'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'error': 'Failed to complete registration',
@@ -468,15 +474,12 @@ def resend_verification_email_view(request):
     EmailVerification.objects.filter(user=user, is_used=False).delete()
 
     # Create new verification token
-    token = get_random_string(32)
+    token = token_urlsafe(24)
     EmailVerification.objects.create(user=user, token=token)
 
     # Send verification email
-    verification_url = f"{settings.FRONTEND_URL}/verify-email/{token}/"
-    try:
-        _send_verification_email(user, verification_url)
-    except Exception as e:
-        print(f"Error sending verification email: {e}")
+    verification_url = f"{VERIFY_EMAIL_URL_PREFIX}{token}/"
+    _send_email_in_background(_send_verification_email, user, verification_url)
     
     return Response({'message': 'Verification email sent'}, status=status.HTTP_200_OK)
 
@@ -502,9 +505,7 @@ def generate_2fa_secret_view(request):
             'message': '2FA secret generated. Please scan the QR code with Google Authenticator and verify with the code.'
         }, status=status.HTTP_200_OK)
     except Exception as e:
-        import traceback
-        print(f"2FA secret generation error: {e}")
-        traceback.print_exc()
+        logger.exception("2FA secret generation error")
         return Response({
             'error': f'Failed to generate 2FA secret: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -562,17 +563,7 @@ def regenerate_backup_codes_view(request):
 @permission_classes([permissions.IsAuthenticated])
 def get_2fa_status_view(request):
     """Get 2FA status for the current user"""
-    user = request.user
-    
-    backup_codes_count = 0
-    if user.two_factor_backup_codes:
-        backup_codes_count = len(user.two_factor_backup_codes)
-    
-    return Response({
-        'two_factor_enabled': user.two_factor_enabled,
-        'has_backup_codes': backup_codes_count > 0,
-        'backup_codes_count': backup_codes_count,
-    }, status=status.HTTP_200_OK)
+    return Response(request.user.get_2fa_status(), status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -586,19 +577,22 @@ def add_to_wishlist_view(request):
                 'error': 'property_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        wishlist, created = Wishlist.objects.get_or_create(
-            user=request.user,
-            property_id=property_id
-        )
-        
-        if created:
-            return Response({
-                'message': 'Property added to wishlist'
-            }, status=status.HTTP_201_CREATED)
-        else:
+        # Insert directly and let the unique (user, property_id) constraint report duplicates
+        try:
+            with transaction.atomic():
+                Wishlist.objects.create(
+                    user=request.user,
+                    property_id=property_id
+                )
+        except IntegrityError:
             return Response({
                 'message': 'Property already in wishlist'
             }, status=status.HTTP_200_OK)
+        
+        cache.delete(_wishlist_cache_key(request.user))
+        return Response({
+            'message': 'Property added to wishlist'
+        }, status=status.HTTP_201_CREATED)
             
     except Exception as e:
         return Response({
@@ -617,6 +611,7 @@ def remove_from_wishlist_view(request, property_id):
         ).delete()
         
         if deleted_count > 0:
+            cache.delete(_wishlist_cache_key(request.user))
             return Response({
                 'message': 'Property removed from wishlist'
             }, status=status.HTTP_200_OK)
@@ -636,10 +631,7 @@ def remove_from_wishlist_view(request, property_id):
 def check_wishlist_view(request, property_id):
     """Check if a property is in user's wishlist"""
     try:
-        is_in_wishlist = Wishlist.objects.filter(
-            user=request.user,
-            property_id=property_id
-        ).exists()
+        is_in_wishlist = property_id in _wishlist_property_ids(request.user)
         
         return Response({
             'is_in_wishlist': is_in_wishlist
@@ -662,24 +654,29 @@ def toggle_wishlist_view(request):
                 'error': 'property_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        existing = Wishlist.objects.filter(
+        # Remove from wishlist; nothing deleted means it wasn't there
+        deleted_count, _ = Wishlist.objects.filter(
             user=request.user,
             property_id=property_id
-        ).first()
+        ).delete()
         
-        if existing:
-            # Remove from wishlist
-            existing.delete()
+        if deleted_count > 0:
+            cache.delete(_wishlist_cache_key(request.user))
             return Response({
                 'is_in_wishlist': False,
                 'message': 'Property removed from wishlist'
             }, status=status.HTTP_200_OK)
         else:
-            # Add to wishlist
-            Wishlist.objects.create(
-                user=request.user,
-                property_id=property_id
-            )
+            # Add to wishlist (a concurrent toggle may have added it already)
+            try:
+                with transaction.atomic():
+                    Wishlist.objects.create(
+                        user=request.user,
+                        property_id=property_id
+                    )
+            except IntegrityError:
+                pass
+            cache.delete(_wishlist_cache_key(request.user))
             return Response({
                 'is_in_wishlist': True,
                 'message': 'Property added to wishlist'
@@ -696,97 +693,108 @@ def toggle_wishlist_view(request):
 def get_wishlist_view(request):
     """Get user's wishlist"""
     try:
-        wishlist = Wishlist.objects.filter(user=request.user)
+        property_ids = list(
+            Wishlist.objects.filter(user=request.user).values_list('property_id', flat=True)
+        )
+        
+        # Load every wishlisted property with its pricing data in a fixed number of queries
+        from django.db.models import Prefetch
+        from properties.models import Property, PropertyAvailability, RoomCategory
+        properties = Property.objects.filter(id__in=property_ids, status='active').prefetch_related(
+            Prefetch(
+                'room_categories',
+                queryset=RoomCategory.objects.only(
+                    'id', 'property', 'base_price', 'has_discount', 'discount_percentage',
+                    'discount_start_date', 'discount_end_date'
+                )
+            ),
+            Prefetch(
+                'availability',
+                queryset=PropertyAvailability.objects.filter(has_discount=True).only('id', 'property'),
+                to_attr='discounted_availability'
+            )
+        )
+        properties_by_id = {property_obj.id: property_obj for property_obj in properties}
         
-        # Get property data using property_id
-        from properties.models import Property
+        today = timezone.now().date()
         wishlist_data = []
-        for item in wishlist:
+        # Keep the wishlist's own (newest first) order
+        for property_id in property_ids:
+            property_obj = properties_by_id.get(property_id)
+            if property_obj is None:
+                continue
             try:
-                # Fetch property by ID
-                property_obj = Property.objects.filter(id=item.property_id, status='active').first()
-                if property_obj:
-                    # Get pricing info using same logic as PropertyListSerializer
-                    from django.utils import timezone
-                    today = timezone.now().date()
-                    
-                    # Calculate effective price (minimum from room categories with discounts)
-                    prices = []
-                    for room_category in property_obj.room_categories.all():
-                        if room_category.base_price and room_category.base_price > 0:
-                            effective_price = room_category.get_effective_price()
-                            if effective_price and effective_price > 0:
-                                prices.append(effective_price)
-                    
-                    # Get minimum effective price or fallback to property price
-                    effective_price = min(prices) if prices else (float(property_obj.price_per_night) if property_obj.price_per_night and float(property_obj.price_per_night) > 0 else 0)
-                    
-                    # Get original price (minimum base price from room categories)
-                    base_prices = []
-                    for room_category in property_obj.room_categories.all():
-                        if room_category.base_price and room_category.base_price > 0:
-                            base_prices.append(float(room_category.base_price))
-                    
-                    original_price = min(base_prices) if base_prices else (float(property_obj.price_per_night) if property_obj.price_per_night and float(property_obj.price_per_night) > 0 else 0)
-                    
-                    # Check for active discounts
-                    has_category_discount = property_obj.room_categories.filter(
-                        has_discount=True,
-                        discount_start_date__lte=today,
-                        discount_end_date__gte=today
-                    ).exists()
-                    
-                    has_availability_discount = property_obj.availability.filter(
-                        has_discount=True
-                    ).exists()
-                    
-                    has_discount = has_category_discount or has_availability_discount
-                    
-                    # Get highest discount percentage
-                    discount_category = property_obj.room_categories.filter(
-                        has_discount=True,
-                        discount_start_date__lte=today,
-                        discount_end_date__gte=today
-                    ).order_by('-discount_percentage').first()
-                    
-                    discount_percentage = discount_category.discount_percentage if discount_category else 0
-                    
-                    property_data = {
-                        'id': property_obj.id,
-                        'name': property_obj.name,
-                        'type': property_obj.type,
-                        'description': property_obj.description,
-                        'location': {
-                            'address': property_obj.address,
-                            'city': property_obj.city,
-                            'country': property_obj.country,
-                            'coordinates': {
-                                'lat': property_obj.latitude,
-                                'lng': property_obj.longitude
-                            }
-                        },
-                        'price_per_night': effective_price,
-                        'original_price': original_price if has_discount else None,
-                        'currency': property_obj.currency,
-                        'images': property_obj.images[:5] if property_obj.images else [],
-                        'rating': property_obj.rating,
-                        'review_count': property_obj.review_count,
-                        'amenities': property_obj.amenities if property_obj.amenities else [],
-                        'highlights': property_obj.highlights if property_obj.highlights else [],
-                        'free_cancellation': property_obj.free_cancellation,
-                        'breakfast_included': property_obj.breakfast_included,
-                        'featured': property_obj.featured,
-                        'owner': property_obj.owner.id,
-                        'status': property_obj.status,
-                        'has_discount': has_discount,
-                        'discount_percentage': discount_percentage,
-                        'is_discount_active': has_discount,
-                        'created_at': property_obj.created_at.isoformat(),
-                        'updated_at': property_obj.updated_at.isoformat(),
-                    }
-                    wishlist_data.append(property_data)
-            except Exception as e:
-                print(f"Error fetching property {item.property_id}: {e}")
+                # Get pricing info using same logic as PropertyListSerializer
+                room_categories = [
+                    room_category for room_category in property_obj.room_categories.all()
+                    if room_category.base_price and room_category.base_price > 0
+                ]
+                fallback_price = float(property_obj.price_per_night) if property_obj.price_per_night and float(property_obj.price_per_night) > 0 else 0
+                
+                # Calculate effective price (minimum from room categories with discounts)
+                prices = [
+                    price for price in (room_category.get_effective_price() for room_category in room_categories)
+                    if price and price > 0
+                ]
+                effective_price = min(prices) if prices else fallback_price
+                
+                # Get original price (minimum base price from room categories)
+                base_prices = [float(room_category.base_price) for room_category in room_categories]
+                original_price = min(base_prices) if base_prices else fallback_price
+                
+                # Check for active discounts
+                discount_categories = [
+                    room_category for room_category in property_obj.room_categories.all()
+                    if room_category.has_discount
+                    and room_category.discount_start_date and room_category.discount_start_date <= today
+                    and room_category.discount_end_date and room_category.discount_end_date >= today
+                ]
+                has_discount = bool(discount_categories) or bool(property_obj.discounted_availability)
+                
+                # Get highest discount percentage
+                discount_category = max(
+                    discount_categories,
+                    key=lambda room_category: room_category.discount_percentage or 0,
+                    default=None
+                )
+                discount_percentage = discount_category.discount_percentage if discount_category else 0
+                
+                property_data = {
+                    'id': property_obj.id,
+                    'name': property_obj.name,
+                    'type': property_obj.type,
+                    'description': property_obj.description,
+                    'location': {
+                        'address': property_obj.address,
+                        'city': property_obj.city,
+                        'country': property_obj.country,
+                        'coordinates': {
+                            'lat': property_obj.latitude,
+                            'lng': property_obj.longitude
+                        }
+                    },
+                    'price_per_night': effective_price,
+                    'original_price': original_price if has_discount else None,
+                    'currency': property_obj.currency,
+                    'images': property_obj.images[:5] if property_obj.images else [],
+                    'rating': property_obj.rating,
+                    'review_count': property_obj.review_count,
+                    'amenities': property_obj.amenities if property_obj.amenities else [],
+                    'highlights': property_obj.highlights if property_obj.highlights else [],
+                    'free_cancellation': property_obj.free_cancellation,
+                    'breakfast_included': property_obj.breakfast_included,
+                    'featured': property_obj.featured,
+                    'owner': property_obj.owner_id,
+                    'status': property_obj.status,
+                    'has_discount': has_discount,
+                    'discount_percentage': discount_percentage,
+                    'is_discount_active': has_discount,
+                    'created_at': property_obj.created_at.isoformat(),
+                    'updated_at': property_obj.updated_at.isoformat(),
+                }
+                wishlist_data.append(property_data)
+            except Exception:
+                logger.exception("Error fetching property %s", property_id)
                 continue
         
         return Response({
@@ -894,7 +902,8 @@ def change_password_view(request):
 @permission_classes([permissions.AllowAny])
 def request_owner_invitation_view(request):
     """Request an invitation to become an owner"""
-    email = request.data.get('email')
+    # Invitations are stored lowercased, like user emails, so lookups stay exact
+    email = (request.data.get('email') or '').lower()
     owner_type = request.data.get('owner_type', 'single')
     property_id = request.data.get('property_id')
     
@@ -907,12 +916,11 @@ def request_owner_invitation_view(request):
         from django.contrib.auth.tokens import default_token_generator
         from django.utils.http import urlsafe_base64_encode
         from django.utils.encoding import force_bytes
-        from django.utils.crypto import get_random_string
         
         User = get_user_model()
         
         # Check if user already exists
-        existing_user = User.objects.filter(email__iexact=email).first()
+        existing_user = User.objects.filter(email=email).first()
         
         if existing_user:
             # User exists - check if already an owner
@@ -924,7 +932,7 @@ def request_owner_invitation_view(request):
             
             # User exists but not an owner - check for pending invitation
             pending_invitation = EmailVerification.objects.filter(
-                email__iexact=email,
+                email=email,
                 invitation_type='owner_invitation',
                 is_used=False
             ).first()
@@ -934,7 +942,7 @@ def request_owner_invitation_view(request):
                 token = pending_invitation.token
             else:
                 # Create new invitation
-                token = get_random_string(32)
+                token = token_urlsafe(24)
                 EmailVerification.objects.create(
                     email=email,
                     token=token,
@@ -944,7 +952,7 @@ def request_owner_invitation_view(request):
                 )
         else:
             # User doesn't exist - create invitation for new user registration
-            token = get_random_string(32)
+            token = token_urlsafe(24)
             EmailVerification.objects.create(
                 email=email,
                 token=token,
@@ -956,28 +964,25 @@ def request_owner_invitation_view(request):
         # Generate invitation URL based on owner_type
         uidb64 = urlsafe_base64_encode(force_bytes(0))  # Use 0 since user might not exist yet
         if owner_type == 'single':
-            invitation_url = f"{settings.FRONTEND_URL}/owner/single-verify-email?token={token}"
+            invitation_url = f"{SINGLE_OWNER_INVITATION_URL_PREFIX}{token}"
         else:
-            invitation_url = f"{settings.FRONTEND_URL}/owner/verify-email?token={token}"
+            invitation_url = f"{OWNER_INVITATION_URL_PREFIX}{token}"
         
         if property_id:
             invitation_url += f"&property_id={property_id}"
         
         # Send invitation email (using the same wrapper function as verification emails)
-        try:
-            # Create a dummy user object for the email template
-            class DummyUser:
-                def __init__(self, email, owner_type):
-                    self.email = email
-                    self.first_name = ''
-                    self.last_name = ''
-                    self.username = email.split('@')[0]
-                    self.owner_type = owner_type
-                    
-            dummy_user = DummyUser(email, owner_type)
-            _send_verification_email(dummy_user, invitation_url)
-        except Exception as email_error:
-            print(f"Error sending invitation email: {email_error}")
+        # Create a dummy user object for the email template
+        class DummyUser:
+            def __init__(self, email, owner_type):
+                self.email = email
+                self.first_name = ''
+                self.last_name = ''
+                self.username = email.split('@')[0]
+                self.owner_type = owner_type
+                
+        dummy_user = DummyUser(email, owner_type)
+        _send_email_in_background(_send_verification_email, dummy_user, invitation_url)
         
         return Response({
             'message': 'Invitation sent successfully. Please check your email to complete registration.',
@@ -991,6 +996,20 @@ def request_owner_invitation_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _send_email_in_background(send, *args):
+    """Queue an email wrapper on the email pool once the current transaction commits"""
+    def run():
+        try:
+            send(*args)
+        except Exception:
+            logger.exception("Error in %s", send.__name__)
+        finally:
+            # Pool threads are reused; don't hold database connections between sends
+            connections.close_all()
+
+    transaction.on_commit(lambda: _email_executor.submit(run))
+
+
 # Import email functions at the end to avoid circular imports
 def _send_verification_email(user, verification_url):
     """Wrapper for sending verification email - imported from notifications.utils"""
@@ -61,7 +61,7 @@ from django.contrib.admin import site
 from dashboard.models import (
     OwnerDashboardStats
 )
-from accounts.models import User, UserProfile
+from accounts.models import User, UserProfile, Wishlist
 from properties.models import (
     PropertyType, Property, Room, PropertyImage, RoomImage,
     PropertyAvailability, RoomAvailability, PropertyFeature,
@@ -74,8 +74,6 @@ from notifications.models import Notification, EmailTemplate, EmailNotification
 from payments.models import PaymentMethod, MonthlyInvoice
 
 # Re-register all models with custom admin site
-admin_site.register(User)
-admin_site.register(UserProfile)
 admin_site.register(PropertyType)
 admin_site.register(Property)
 admin_site.register(Room)
@@ -100,6 +98,12 @@ admin_site.register(EmailNotification)
 admin_site.register(OwnerDashboardStats)
 admin_site.register(PaymentMethod)
 
+# Register account models with their admin classes
+from accounts.admin import UserAdmin, UserProfileAdmin, WishlistAdmin
+admin_site.register(User, UserAdmin)
+admin_site.register(UserProfile, UserProfileAdmin)
+admin_site.register(Wishlist, WishlistAdmin)
+
 # Register MonthlyInvoice with its admin class
 from payments.admin import MonthlyInvoiceAdmin
 admin_site.register(MonthlyInvoice, MonthlyInvoiceAdmin)
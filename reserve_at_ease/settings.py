@@ -34,6 +34,11 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 USE_RELOADER = config('USE_RELOADER', default=False, cast=bool)
 
 ALLOWED_HOSTS = ['*']
+
+# Set when running behind a reverse proxy (e.g. Render) that appends the client
+# address to X-Forwarded-For; REMOTE_ADDR is then the proxy's address
+BEHIND_PROXY = config('BEHIND_PROXY', default=False, cast=bool)
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
@@ -141,6 +146,30 @@ DATABASES = {
     }
 }
 
+# Cache
+# Admin session tokens, login lockouts and the wishlist/2FA status caches must be
+# shared by every worker, so deployments set REDIS_URL. Without it each process
+# gets its own local-memory cache, which is only correct for a single-process
+# development server.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -332,3 +361,20 @@ if not DEBUG:
 OTP_TOTP_ISSUER = 'ReserveWithEase'
 OTP_TOTP_DIGITS = 6
 OTP_TOTP_STEP = 30
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'accounts': {
+            'handlers': ['console'],
+            'level': config('ACCOUNTS_LOG_LEVEL', default='INFO'),
+        },
+    },
+}